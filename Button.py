@@ -1,5 +1,7 @@
 import pygame
 
+from text_cache import text_cache
+
 class Button():
     def __init__(self, color, x, y, width, height, text=''):
         self.color = color
@@ -17,8 +19,7 @@ class Button():
         pygame.draw.rect(win, self.color, (self.x, self.y, self.width, self.height), 0)
 
         if self.text != '':
-            font = pygame.font.SysFont('comicsans', 60)
-            text = font.render(self.text, 1, (0, 0, 0))
+            text = text_cache.render(self.text, 'comicsans', 60, (0, 0, 0), True)
             win.blit(text, (
             self.x + (self.width / 2 - text.get_width() / 2), self.y + (self.height / 2 - text.get_height() / 2)))
 
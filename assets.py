@@ -0,0 +1,132 @@
+import os
+import time
+
+import pygame
+
+
+class AssetManager:
+    def __init__(self, base_dir, scale=1.0):
+        """Laddar bilder först när de behövs, konverterade till skärmens format och skalade i förväg.
+
+        Bilderna kan bara laddas efter att fönstret har skapats, eftersom convert() behöver
+        skärmens pixelformat.
+
+        Args:
+            base_dir (str): Katalogen som bildernas filnamn är relativa till.
+            scale (float): Skalan som bilderna och koordinaterna ritas i.
+        """
+        self.base_dir = base_dir
+        self.scale = scale
+        self._paths = {}
+        self._variants = {}  # (namn, skala) -> pygame.Surface
+        self._stats = {}  # (namn, skala) -> statistik för varianten
+
+    def register(self, name, filename):
+        """Registrerar en bild utan att ladda den.
+
+        Args:
+            name (str): Namnet som bilden hämtas med.
+            filename (str): Filnamnet, relativt till base_dir.
+        """
+        self._paths[name] = os.path.join(self.base_dir, filename)
+
+    def set_scale(self, scale):
+        """Byter skala. Varianter för andra skalor släpps och nya skapas när de hämtas.
+
+        Args:
+            scale (float): Den nya skalan.
+        """
+        if scale == self.scale:
+            return
+        self.scale = scale
+        for key in [key for key in self._variants if key[1] != scale]:
+            del self._variants[key]
+            del self._stats[key]
+
+    def get(self, name):
+        """Hämtar en bild i den aktiva skalan och laddar den första gången.
+
+        Args:
+            name (str): Bildens namn.
+
+        Returns:
+            pygame.Surface: Bilden, konverterad till skärmens format.
+        """
+        key = (name, self.scale)
+        surface = self._variants.get(key)
+        if surface is None:
+            surface = self._load(name)
+        return surface
+
+    def _load(self, name):
+        """Laddar, skalar och konverterar en bild och sparar statistik för den."""
+        if pygame.display.get_surface() is None:
+            raise pygame.error("Bilder kan inte laddas innan fönstret har skapats")
+
+        start = time.perf_counter()
+        surface = pygame.image.load(self._paths[name])
+        if self.scale != 1.0:
+            width, height = surface.get_size()
+            size = (max(1, round(width * self.scale)), max(1, round(height * self.scale)))
+            surface = pygame.transform.smoothscale(surface, size)
+        # Bilder med genomskinlighet behåller sin alfakanal
+        if surface.get_flags() & pygame.SRCALPHA:
+            surface = surface.convert_alpha()
+        else:
+            surface = surface.convert()
+
+        key = (name, self.scale)
+        self._variants[key] = surface
+        self._stats[key] = {
+            "name": name,
+            "scale": self.scale,
+            "size": surface.get_size(),
+            "load_ms": (time.perf_counter() - start) * 1000,
+            "bytes": surface.get_pitch() * surface.get_height(),
+        }
+        return surface
+
+    def scale_point(self, point):
+        """Skalar en punkt från kartbildens koordinater, t.ex. en stad i Graph.cities.
+
+        Args:
+            point (Tuple[int, int]): Punkten i originalskala.
+
+        Returns:
+            Tuple[int, int]: Punkten i den aktiva skalan.
+        """
+        if self.scale == 1.0:
+            return point
+        return round(point[0] * self.scale), round(point[1] * self.scale)
+
+    def scale_points(self, points):
+        """Skalar en lista med punkter, t.ex. koordinaterna för en rutt.
+
+        Args:
+            points (List[Tuple[int, int]]): Punkterna i originalskala.
+
+        Returns:
+            List[Tuple[int, int]]: Punkterna i den aktiva skalan.
+        """
+        if self.scale == 1.0:
+            return points
+        return [self.scale_point(point) for point in points]
+
+    def scale_length(self, length):
+        """Skalar en längd, t.ex. en linjetjocklek eller radie, och avrundar till minst 1.
+
+        Args:
+            length (int): Längden i originalskala.
+
+        Returns:
+            int: Längden i den aktiva skalan.
+        """
+        return max(1, round(length * self.scale))
+
+    def stats(self):
+        """Hämtar laddningstid och minnesåtgång för de laddade bilderna.
+
+        Returns:
+            List[dict]: En post per laddad variant med namn, skala, storlek, laddningstid i ms och byte.
+        """
+        return list(self._stats.values())
@@ -0,0 +1,362 @@
+"""Prestandamätningar för vägsökning, biljettgenerering och ritning av en bild.
+
+Exempel:
+    python benchmark.py --output baseline.json
+    python benchmark.py --baseline baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+# Ritningen mäts utan riktigt fönster
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import core
+
+DEFAULT_SEED = 1234
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.10
+
+# Antal anrop per mätning för de slumpade funktionerna
+ROUTE_CALLS = 1000
+POINTS_CALLS = 10000
+LONGEST_ROUTE_BOARDS = 300
+BLOCKED_ROUTES = 40
+
+# Hit-test på en slumpad karta med tiotusentals förbindelser
+HIT_TEST_CITIES = 20000
+HIT_TEST_QUERIES = 1000
+
+BENCHMARKS = {}
+
+
+def benchmark(name, ops):
+    """Registrerar en mätning.
+
+    Funktionen anropas med ett frö och returnerar en funktion utan argument som utför
+    `ops` operationer. Förberedelser görs utanför tidtagningen.
+
+    Args:
+        name (str): Mätningens namn.
+        ops (int): Antal operationer per körning, för att räkna ut tid per operation.
+    """
+    def register(setup):
+        BENCHMARKS[name] = (setup, ops)
+        return setup
+    return register
+
+
+# =================
+# Mätningar
+
+# core.graph är den kompilerade kartan om den finns, jämförelsen görs alltid med källkartan
+_GRAPH = core.load_graph(core.EUROPE_MAP)
+_PAIRS = [(a, b) for a in _GRAPH.cities for b in _GRAPH.cities]
+
+
+@benchmark("a_star_graph", len(_PAIRS))
+def _a_star_graph(seed):
+    return lambda: [core.a_star(a, b, _GRAPH) for a, b in _PAIRS]
+
+
+@benchmark("a_star_compact", len(_PAIRS))
+def _a_star_compact(seed):
+    graph_local = _GRAPH.compact()
+    return lambda: [core.a_star(a, b, graph_local) for a, b in _PAIRS]
+
+
+@benchmark("a_star_compact_dijkstra", len(_PAIRS))
+def _a_star_compact_dijkstra(seed):
+    graph_local = _GRAPH.compact()
+    return lambda: [core.a_star(a, b, graph_local, use_heuristic=False) for a, b in _PAIRS]
+
+
+@benchmark("a_star_path_table", len(_PAIRS))
+def _a_star_path_table(seed):
+    graph_local = _GRAPH.compact()
+    graph_local.path_table = core.ShortestPathTable.build(graph_local)
+    return lambda: [core.a_star(a, b, graph_local) for a, b in _PAIRS]
+
+
+@benchmark("route_planner", ROUTE_CALLS)
+def _route_planner(seed):
+    def run():
+        rng = random.Random(seed)
+        for _ in range(ROUTE_CALLS):
+            core.route_planner(9, rng)
+    return run
+
+
+@benchmark("route_creater", ROUTE_CALLS)
+def _route_creater(seed):
+    def run():
+        rng = random.Random(seed)
+        for _ in range(ROUTE_CALLS):
+            core.route_creater(9, rng)
+    return run
+
+
+@benchmark("lsh", ROUTE_CALLS)
+def _lsh(seed):
+    def run():
+        rng = random.Random(seed)
+        for _ in range(ROUTE_CALLS):
+            core.lsh(rng)
+    return run
+
+
+@benchmark("calculate_points", POINTS_CALLS)
+def _calculate_points(seed):
+    rng = random.Random(seed)
+    cities = [info["coords"] for info in core.graph.cities.values()]
+    arguments = [(rng.choice(cities), rng.choice(cities), rng.randrange(1, 20)) for _ in range(POINTS_CALLS)]
+
+    def run():
+        points_rng = random.Random(seed)
+        for point_a, point_b, trains in arguments:
+            core.calculate_points(point_a, point_b, trains, points_rng)
+    return run
+
+
+@benchmark("longest_route", LONGEST_ROUTE_BOARDS)
+def _longest_route(seed):
+    from game_state import GameState
+    from longest_route import LongestRouteSolver
+
+    # Slutställningar där varje spelare har tagit slumpade förbindelser tills tågen tog slut
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < LONGEST_ROUTE_BOARDS:
+        state = GameState(num_players=3, seed=rng.randrange(2 ** 32))
+        player = 0
+        while not state.last_round:
+            claims = state.legal_claims(player)
+            if claims and rng.random() < 0.5:
+                state.claim(player, *rng.choice(claims))
+            elif state.draw_card(player) is None and not claims:
+                break
+            player = (player + 1) % len(state.players)
+        boards.extend(list(player_state.routes) for player_state in state.players)
+    routes = state.routes
+
+    def run():
+        solver = LongestRouteSolver(routes)  # Tom cache, varje ställning löses från början
+        for board in boards[:LONGEST_ROUTE_BOARDS]:
+            solver.longest(board)
+    return run
+
+
+def _blocking_sequence(seed):
+    """Slumpar en följd av tagna förbindelser, varannan egen (vikt 0) och varannan blockerad."""
+    from game_state import claimable_routes
+
+    routes = claimable_routes(core.compact_graph)
+    rng = random.Random(seed)
+    order = rng.sample(range(len(routes)), BLOCKED_ROUTES)
+    return [(routes[route_id][0], routes[route_id][1], None if i % 2 else 0) for i, route_id in enumerate(order)]
+
+
+@benchmark("dynamic_paths", BLOCKED_ROUTES)
+def _dynamic_paths(seed):
+    from dynamic_paths import DynamicShortestPaths
+
+    claims = _blocking_sequence(seed)
+    num_cities = len(core.compact_graph)
+
+    def run():
+        paths = DynamicShortestPaths(core.compact_graph)
+        for a_id, b_id, weight in claims:
+            paths.set_route_weight(a_id, b_id, weight)
+            for city in range(num_cities):
+                paths.distance(city, num_cities - 1 - city)
+    return run
+
+
+@benchmark("dynamic_paths_recompute", BLOCKED_ROUTES)
+def _dynamic_paths_recompute(seed):
+    from dynamic_paths import DynamicShortestPaths
+
+    claims = _blocking_sequence(seed)
+    num_cities = len(core.compact_graph)
+
+    def run():
+        paths = DynamicShortestPaths(core.compact_graph)
+        for a_id, b_id, weight in claims:
+            paths.set_route_weight(a_id, b_id, weight)
+            for city in range(num_cities):
+                paths.dijkstra(city)[0][num_cities - 1 - city]
+    return run
+
+
+@benchmark("hit_test_large", HIT_TEST_QUERIES)
+def _hit_test_large(seed):
+    import mapgen
+    from spatial_index import SpatialIndex
+
+    index = SpatialIndex.from_graph(mapgen.build_graph(HIT_TEST_CITIES, seed))
+    width, height = mapgen.map_size(HIT_TEST_CITIES)
+    rng = random.Random(seed)
+    positions = [(rng.uniform(0, width), rng.uniform(0, height)) for _ in range(HIT_TEST_QUERIES)]
+    return lambda: [index.hit_test(position, 12) for position in positions]
+
+
+def _frame_setup(seed):
+    """Öppnar ett fönster med dummy-drivrutinen och skapar en renderare som i main.
+
+    Returns:
+        Tuple[module, Renderer]: main-modulen och renderaren.
+    """
+    import pygame
+
+    import main
+    from renderer import Renderer
+
+    pygame.init()
+    main.screen = pygame.display.set_mode(main.assets.scale_point((main.WIDTH, main.HEIGHT)))
+    renderer = Renderer(main.screen, main.GRAY, [
+        (main.assets.get("background"), (0, 0)),
+        (main.assets.get("card"), main.assets.scale_point((260, 710))),
+        (main.assets.get("card_blue"), main.assets.scale_point((1200, 710))),
+    ])
+    main.set_routes(core.start_game(9, 3, random.Random(seed)), renderer)
+    renderer.render()
+    return main, renderer
+
+
+@benchmark("frame_full", 1)
+def _frame_full(seed):
+    _, renderer = _frame_setup(seed)
+
+    def run():
+        renderer.invalidate()
+        renderer.render()
+    return run
+
+
+@benchmark("frame_new_routes", 1)
+def _frame_new_routes(seed):
+    main, renderer = _frame_setup(seed)
+    routes = core.start_game(9, 3, random.Random(seed))
+
+    def run():
+        main.set_routes(routes, renderer)
+        renderer.render()
+    return run
+
+
+# =================
+# Körning och jämförelse
+
+def run_benchmarks(names=None, seed=DEFAULT_SEED, repeat=DEFAULT_REPEAT):
+    """Kör mätningarna.
+
+    Args:
+        names (List[str] | None): Mätningarna som ska köras, None för alla.
+        seed (int): Fröet för slumpgeneratorerna.
+        repeat (int): Antal körningar per mätning.
+
+    Returns:
+        dict: Metadata och en post per mätning med min-, median- och medeltid.
+    """
+    results = {}
+    for name in names or BENCHMARKS:
+        setup, ops = BENCHMARKS[name]
+        function = setup(seed)
+        function()  # Uppvärmning, fyller cacher och laddar bilder
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+        median = statistics.median(times)
+        results[name] = {
+            "ops": ops,
+            "repeat": repeat,
+            "min_s": min(times),
+            "median_s": median,
+            "mean_s": statistics.fmean(times),
+            "per_op_us": median / ops * 1e6,
+        }
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeat": repeat,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """Jämför mätningar med en sparad baslinje.
+
+    Args:
+        current (dict): Resultatet från run_benchmarks.
+        baseline (dict): En tidigare sparad körning.
+        threshold (float): Hur mycket långsammare (andel) en mätning får vara innan den räknas som en regression.
+
+    Returns:
+        List[dict]: En post per mätning som finns i båda, med kvoten nu/baslinje och om det är en regression.
+    """
+    comparison = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        ratio = result["median_s"] / baseline["results"][name]["median_s"]
+        comparison.append({
+            "name": name,
+            "baseline_s": baseline["results"][name]["median_s"],
+            "current_s": result["median_s"],
+            "ratio": ratio,
+            "regression": ratio > 1 + threshold,
+        })
+    return comparison
+
+
+def main(argv=None):
+    """Kommandoradsgränssnittet för mätningarna."""
+    parser = argparse.ArgumentParser(description="Prestandamätningar för Ticket to Ride.")
+    parser.add_argument("--output", help="skriver resultatet som JSON till filen")
+    parser.add_argument("--baseline", help="jämför med en tidigare sparad JSON-fil")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="tillåten försämring innan en regression rapporteras (standard 0.10)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="frö för slumpgeneratorn")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="körningar per mätning")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="kör bara de här mätningarna")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.only, args.seed, args.repeat)
+    for name, result in report["results"].items():
+        print(f"{name:28} {result['median_s'] * 1000:10.3f} ms  {result['per_op_us']:10.2f} µs/op")
+
+    regression = False
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        report["comparison"] = compare(report, baseline, args.threshold)
+        print()
+        for entry in report["comparison"]:
+            flag = "REGRESSION" if entry["regression"] else ""
+            print(f"{entry['name']:28} {entry['ratio']:6.2f}x {flag}")
+        regression = any(entry["regression"] for entry in report["comparison"])
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    if regression:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
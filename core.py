@@ -0,0 +1,1305 @@
+"""Spelets kärna utan pygame: grafen, vägsökning, ruttplanering, LSH och poängberäkning.
+
+Modulen kan importeras från batchjobb och andra processer utan att något fönster öppnas.
+"""
+import hashlib
+import heapq
+import json
+import math
+import os
+import random
+import struct
+import sys
+import time
+from array import array
+from collections import defaultdict
+from typing import List, Tuple
+
+# =================
+# Konfiguration
+
+# Kartbildens storlek, städernas koordinater är givna i den
+I_WIDTH = 1200
+I_HEIGHT = 760
+
+# Kartfiler
+MAP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "maps")
+EUROPE_MAP = os.path.join(MAP_DIR, "europe.json")
+EUROPE_COMPILED_MAP = os.path.join(MAP_DIR, "europe.ttrmap")  # Skapas med mapfile.py, se load_default_map
+
+# Katalog för cachade kortaste-vägen-tabeller
+PATH_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".ttr_cache")
+
+
+# =================
+# Klasser
+
+class Graph:
+    def __init__(self):
+        """Initialiserar en graf med städer och deras förbindelser."""
+        self.connections = defaultdict(list)  # Förbindelser mellan städer
+        self.cities = {}  # Städer och deras koordinater
+        self._heuristic_scale = None  # Kalibrerad skala för A*-heuristiken
+
+    def add_city(self, name: str, coords: Tuple[int, int], links: List[Tuple[str, int, int]]):
+        """Lägger till en stad i grafen med dess namn, koordinater och länkar till andra städer.
+        
+        Args:
+            name (str): Stadens namn.
+            coords (Tuple[int, int]): Stadens koordinater.
+            links (List[Tuple[str, int, int]]): Lista över länkar till andra städer (stad, avstånd, vikt).
+        """
+        self.cities[name] = {"coords": coords, "branches": len(links)}
+        for city, distance, weight in links:
+            self.connections[name].append({"city": city, "distance": distance, "weight": weight})
+        self._heuristic_scale = None
+
+    def heuristic_scale(self):
+        """Kalibrerar skalan mellan pixelavstånd och avstånd i tåg för A*-heuristiken.
+
+        Skalan är den minsta kvoten avstånd / pixelavstånd över alla förbindelser, så att
+        skala * pixelavstånd aldrig överskattar den verkliga kostnaden.
+
+        Returns:
+            float: Skalan, eller 0 om heuristiken inte kan användas.
+        """
+        if self._heuristic_scale is None:
+            edges = []
+            for name, connections in self.connections.items():
+                for connection in connections:
+                    if name not in self.cities or connection["city"] not in self.cities:
+                        edges = None
+                        break
+                    edges.append((self.cities[name]["coords"], self.cities[connection["city"]]["coords"],
+                                  connection["distance"]))
+                if edges is None:
+                    break
+            self._heuristic_scale = _calibrate_heuristic(edges)
+        return self._heuristic_scale
+
+    def neighbors(self, city_name):
+        """Hämtar alla grannstäder till en given stad.
+        
+        Args:
+            city_name (str): Namnet på staden.
+
+        Returns:
+            List[str]: Lista över grannstäder.
+        """
+        list_connections = []
+        connections = self.connections[city_name]
+        for cities in connections:
+            list_connections.append(cities['city'])
+        return list_connections
+
+    def cost(self, pointA, pointB):
+        """Hämtar kostnaden mellan två städer.
+        
+        Args:
+            pointA (str): Namnet på startstaden.
+            pointB (str): Namnet på slutstaden.
+
+        Returns:
+            Tuple[int, str]: Avståndet och namnet på slutstaden.
+        """
+        connections = self.connections[pointA]
+        for cities in connections:
+            if cities['city'] == pointB:
+                return cities['distance'], cities['city']
+
+    def compact(self):
+        """Bygger en kompakt kopia av grafen.
+
+        Returns:
+            CompactGraph: Grafen i CSR-form med heltals-ID för städerna.
+        """
+        compact_graph = CompactGraph()
+        for name, info in self.cities.items():
+            links = [(c["city"], c["distance"], c["weight"]) for c in self.connections[name]]
+            compact_graph.add_city(name, info["coords"], links)
+        return compact_graph.build()
+
+
+class CompactGraph:
+    def __init__(self):
+        """Initialiserar en kompakt graf där städerna har heltals-ID och kanterna ligger i CSR-arrayer.
+
+        Städerna läggs till med samma `add_city` som i `Graph`. Arrayerna byggs en gång,
+        första gången grafen används (eller direkt via `build`). En graf kan också skapas
+        direkt från färdiga arrayer med `from_arrays`, t.ex. från en minnesmappad kartfil.
+        """
+        self._cities = {}  # Städer och deras koordinater, som i Graph
+        self.names = []  # id -> stadens namn
+        self._ids = {}  # stadens namn -> id
+        self.offsets = array("l")  # Kanterna för stad i ligger i [offsets[i], offsets[i + 1])
+        self.targets = array("l")  # Grannstadens id för varje kant
+        self.distances = array("l")  # Avståndet (antal tåg) för varje kant
+        self.weights = array("l")  # Vikten för varje kant
+        self.xs = array("d")  # x-koordinat för varje stad
+        self.ys = array("d")  # y-koordinat för varje stad
+        self._heuristic_scale = 0.0
+        self._links = {}  # Länkar som ännu inte byggts in i arrayerna
+        self._edge_index = None  # (a_id * antal städer + b_id) -> kantens index, byggs vid behov
+        self._neighbor_names = None  # id -> grannarnas namn, byggs vid behov
+        self.path_table = None  # Förberäknad ShortestPathTable som a_star använder om den finns
+        self.buffer = None  # Bufferten som arrayerna läser ur om grafen skapats med from_arrays
+        self._built = False
+
+    def add_city(self, name: str, coords: Tuple[int, int], links: List[Tuple[str, int, int]]):
+        """Lägger till en stad i grafen med dess namn, koordinater och länkar till andra städer.
+
+        Args:
+            name (str): Stadens namn.
+            coords (Tuple[int, int]): Stadens koordinater.
+            links (List[Tuple[str, int, int]]): Lista över länkar till andra städer (stad, avstånd, vikt).
+        """
+        if self._links is None:
+            raise ValueError("En graf som skapats från arrayer kan inte ändras")
+        self._cities[name] = {"coords": coords, "branches": len(links)}
+        self._links.setdefault(name, []).extend(links)
+        self._built = False
+
+    @classmethod
+    def from_arrays(cls, names, offsets, targets, distances, weights, xs, ys, heuristic_scale=None, buffer=None):
+        """Skapar en graf direkt från färdiga CSR-arrayer utan att kopiera dem.
+
+        Arrayerna kan vara array-objekt eller memoryview över en buffert. Uppslagstabellerna
+        för namn och kanter byggs först när de behövs. Grafen kan inte ändras med `add_city`.
+
+        Args:
+            names (List[str]): Städernas namn i id-ordning.
+            offsets: Kanterna för stad i ligger i [offsets[i], offsets[i + 1]).
+            targets: Grannstadens id för varje kant.
+            distances: Avståndet (antal tåg) för varje kant.
+            weights: Vikten för varje kant.
+            xs: x-koordinat för varje stad.
+            ys: y-koordinat för varje stad.
+            heuristic_scale (float | None): Den kalibrerade skalan för A*, beräknas om den saknas.
+            buffer: Bufferten som arrayerna läser ur. Hålls vid liv så länge grafen finns.
+
+        Returns:
+            CompactGraph: Grafen.
+        """
+        graph_local = cls()
+        graph_local.names = names
+        graph_local._ids = None
+        graph_local._cities = None
+        graph_local.offsets = offsets
+        graph_local.targets = targets
+        graph_local.distances = distances
+        graph_local.weights = weights
+        graph_local.xs = xs
+        graph_local.ys = ys
+        graph_local.buffer = buffer
+        graph_local._links = None
+        graph_local._built = True
+        if heuristic_scale is None:
+            heuristic_scale = _calibrate_heuristic(
+                ((xs[city_id], ys[city_id]), (xs[targets[edge]], ys[targets[edge]]), distances[edge])
+                for city_id in range(len(names))
+                for edge in range(offsets[city_id], offsets[city_id + 1])
+            )
+        graph_local._heuristic_scale = heuristic_scale
+        return graph_local
+
+    @property
+    def ids(self):
+        """dict: Stadens namn -> id."""
+        if self._ids is None:
+            self._ids = {name: city_id for city_id, name in enumerate(self.names)}
+        return self._ids
+
+    @property
+    def cities(self):
+        """dict: Städer och deras koordinater, som i Graph."""
+        if self._cities is None:
+            offsets = self.offsets
+            self._cities = {
+                name: {"coords": (self.xs[city_id], self.ys[city_id]),
+                       "branches": offsets[city_id + 1] - offsets[city_id]}
+                for city_id, name in enumerate(self.names)
+            }
+        return self._cities
+
+    def _city_id(self, name):
+        """Hämtar id för en stad och tilldelar ett nytt om staden inte har något."""
+        city_id = self._ids.get(name)
+        if city_id is None:
+            city_id = len(self.names)
+            self._ids[name] = city_id
+            self.names.append(name)
+        return city_id
+
+    def build(self):
+        """Bygger CSR-arrayerna och uppslagstabellen för kanterna.
+
+        Returns:
+            CompactGraph: Grafen själv, så att anropet kan kedjas.
+        """
+        if self._links is None:
+            raise ValueError("En graf som skapats från arrayer kan inte byggas om")
+
+        # Tilldelar id i den ordning städerna lades till, därefter städer som bara finns som länkmål
+        for name in self._links:
+            self._city_id(name)
+        for links in self._links.values():
+            for city, _, _ in links:
+                self._city_id(city)
+
+        num_cities = len(self.names)
+        self.offsets = array("l", [0])
+        self.targets = array("l")
+        self.distances = array("l")
+        self.weights = array("l")
+        self._edge_index = None
+        self._neighbor_names = None
+
+        for name in self.names:
+            for city, distance, weight in self._links.get(name, ()):
+                self.targets.append(self._ids[city])
+                self.distances.append(distance)
+                self.weights.append(weight)
+            self.offsets.append(len(self.targets))
+
+        # En tidigare tabell gäller inte längre när grafen har ändrats
+        self.path_table = None
+
+        # Städer som bara finns som länkmål saknar koordinater och stänger av heuristiken
+        coords = [self._cities[name]["coords"] if name in self._cities else None for name in self.names]
+        self.xs = array("d", [c[0] if c else 0 for c in coords])
+        self.ys = array("d", [c[1] if c else 0 for c in coords])
+        if None in coords:
+            self._heuristic_scale = 0.0
+        else:
+            self._heuristic_scale = _calibrate_heuristic(
+                (coords[city_id], coords[self.targets[edge]], self.distances[edge])
+                for city_id in range(num_cities)
+                for edge in range(self.offsets[city_id], self.offsets[city_id + 1])
+            )
+
+        self._built = True
+        return self
+
+    def _edge_lookup(self):
+        """Hämtar uppslagstabellen för kanterna och bygger den första gången."""
+        if self._edge_index is None:
+            num_cities = len(self.names)
+            edge_index = {}
+            offsets = self.offsets
+            targets = self.targets
+            for city_id in range(num_cities):
+                for edge in range(offsets[city_id], offsets[city_id + 1]):
+                    # Precis som Graph.cost gäller den första länken om samma granne förekommer flera gånger
+                    edge_index.setdefault(city_id * num_cities + targets[edge], edge)
+            self._edge_index = edge_index
+        return self._edge_index
+
+    def heuristic_scale(self):
+        """Hämtar skalan mellan pixelavstånd och avstånd i tåg för A*-heuristiken.
+
+        Returns:
+            float: Skalan, eller 0 om heuristiken inte kan användas.
+        """
+        if not self._built:
+            self.build()
+        return self._heuristic_scale
+
+    def __len__(self):
+        if not self._built:
+            self.build()
+        return len(self.names)
+
+    def id_of(self, name):
+        """Hämtar heltals-ID för en stad.
+
+        Args:
+            name (str): Stadens namn.
+
+        Returns:
+            int: Stadens id.
+        """
+        if not self._built:
+            self.build()
+        return self.ids[name]
+
+    def name_of(self, city_id):
+        """Hämtar namnet för ett stads-ID.
+
+        Args:
+            city_id (int): Stadens id.
+
+        Returns:
+            str: Stadens namn.
+        """
+        if not self._built:
+            self.build()
+        return self.names[city_id]
+
+    def neighbor_ids(self, city_id):
+        """Hämtar grannarnas id för en stad.
+
+        Args:
+            city_id (int): Stadens id.
+
+        Returns:
+            array: Grannstädernas id (en vy över CSR-arrayen).
+        """
+        if not self._built:
+            self.build()
+        return self.targets[self.offsets[city_id]:self.offsets[city_id + 1]]
+
+    def edge_cost(self, a_id, b_id):
+        """Hämtar avståndet för kanten mellan två städer i O(1).
+
+        Args:
+            a_id (int): Startstadens id.
+            b_id (int): Slutstadens id.
+
+        Returns:
+            int | None: Avståndet, eller None om kanten saknas.
+        """
+        if not self._built:
+            self.build()
+        edge = self._edge_lookup().get(a_id * len(self.names) + b_id)
+        if edge is None:
+            return None
+        return self.distances[edge]
+
+    def neighbors(self, city_name):
+        """Hämtar alla grannstäder till en given stad.
+
+        Args:
+            city_name (str): Namnet på staden.
+
+        Returns:
+            List[str]: Lista över grannstäder.
+        """
+        if not self._built:
+            self.build()
+        city_id = self.ids.get(city_name)
+        if city_id is None:
+            return []
+        if self._neighbor_names is None:
+            names = self.names
+            offsets = self.offsets
+            targets = self.targets
+            self._neighbor_names = [
+                tuple(names[targets[edge]] for edge in range(offsets[i], offsets[i + 1]))
+                for i in range(len(names))
+            ]
+        return list(self._neighbor_names[city_id])
+
+    def cost(self, pointA, pointB):
+        """Hämtar kostnaden mellan två städer.
+
+        Args:
+            pointA (str): Namnet på startstaden.
+            pointB (str): Namnet på slutstaden.
+
+        Returns:
+            Tuple[int, str]: Avståndet och namnet på slutstaden.
+        """
+        if not self._built:
+            self.build()
+        a_id = self.ids.get(pointA)
+        b_id = self.ids.get(pointB)
+        if a_id is None or b_id is None:
+            return None
+        edge = self._edge_lookup().get(a_id * len(self.names) + b_id)
+        if edge is None:
+            return None
+        return self.distances[edge], pointB
+
+    def digest(self):
+        """Beräknar en hash av grafens definition (städer, koordinater och kanter).
+
+        Returns:
+            str: SHA-256 som hexsträng.
+        """
+        if not self._built:
+            self.build()
+        digest = hashlib.sha256()
+        for name in self.names:
+            coords = self.cities[name]["coords"] if name in self.cities else None
+            digest.update(f"{name}|{coords}\n".encode("utf-8"))
+        for values in (self.offsets, self.targets, self.distances, self.weights):
+            digest.update(repr(values.tolist()).encode("ascii"))
+        return digest.hexdigest()
+
+
+class ShortestPathTable:
+    VERSION = 1
+    MAGIC = b"TTRP"
+    HEADER = struct.Struct("<4sHHI")  # magic, version, byteorder (0 = little, 1 = big), antal städer
+
+    def __init__(self, graph_local, dist, next_hop):
+        """Tabell med kortaste kostnad och nästa steg mellan alla par av städer.
+
+        Args:
+            graph_local (CompactGraph): Grafen som tabellen är byggd för.
+            dist (array): Kostnaden från stad i till stad j på index i * n + j, -1 om ingen väg finns.
+            next_hop (array): Nästa stad på vägen från i till j på index i * n + j, -1 om ingen väg finns.
+        """
+        self.graph = graph_local
+        self.size = len(graph_local)
+        self.dist = dist
+        self.next_hop = next_hop
+
+    @classmethod
+    def build(cls, graph_local):
+        """Bygger tabellen med en Dijkstra-sökning från varje stad.
+
+        Args:
+            graph_local (CompactGraph): Grafen som tabellen ska byggas för.
+
+        Returns:
+            ShortestPathTable: Den färdiga tabellen.
+        """
+        size = len(graph_local)
+        offsets = graph_local.offsets
+        targets = graph_local.targets
+        distances = graph_local.distances
+        dist = array("i", [-1]) * (size * size)
+        next_hop = array("i", [-1]) * (size * size)
+
+        for source in range(size):
+            row = source * size
+            best = {source: 0}
+            heap = [(0, source, source)]  # (kostnad, stad, första steget från source)
+            while heap:
+                (cost, node, first) = heapq.heappop(heap)
+                if dist[row + node] != -1:
+                    continue
+                dist[row + node] = cost
+                next_hop[row + node] = first
+                for edge in range(offsets[node], offsets[node + 1]):
+                    neighbor = targets[edge]
+                    if dist[row + neighbor] != -1:
+                        continue
+                    new_cost = cost + distances[edge]
+                    if new_cost < best.get(neighbor, math.inf):
+                        best[neighbor] = new_cost
+                        heapq.heappush(heap, (new_cost, neighbor, neighbor if node == source else first))
+
+        return cls(graph_local, dist, next_hop)
+
+    @classmethod
+    def load_or_build(cls, graph_local, cache_dir=PATH_CACHE_DIR):
+        """Läser tabellen från cachen om den finns, annars byggs och sparas den.
+
+        Cachefilen namnges efter grafens hash, så en ändrad karta ger en ny fil.
+
+        Args:
+            graph_local (CompactGraph): Grafen som tabellen gäller.
+            cache_dir (str): Katalogen för cachefilerna.
+
+        Returns:
+            ShortestPathTable: Tabellen för grafen.
+        """
+        path = os.path.join(cache_dir, f"paths-{graph_local.digest()}.bin")
+        table = cls.load(path, graph_local)
+        if table is None:
+            table = cls.build(graph_local)
+            try:
+                table.save(path)
+            except OSError:
+                # Utan skrivbar cache fungerar tabellen ändå, den byggs bara om nästa gång
+                pass
+        return table
+
+    @classmethod
+    def load(cls, path, graph_local):
+        """Läser en sparad tabell.
+
+        Args:
+            path (str): Sökvägen till cachefilen.
+            graph_local (CompactGraph): Grafen som tabellen gäller.
+
+        Returns:
+            ShortestPathTable | None: Tabellen, eller None om filen saknas eller inte passar.
+        """
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except OSError:
+            return None
+
+        if len(data) < cls.HEADER.size:
+            return None
+        magic, version, byteorder, size = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC or version != cls.VERSION or size != len(graph_local):
+            return None
+
+        dist = array("i")
+        next_hop = array("i")
+        cells = size * size * dist.itemsize
+        if len(data) != cls.HEADER.size + 2 * cells:
+            return None
+        dist.frombytes(data[cls.HEADER.size:cls.HEADER.size + cells])
+        next_hop.frombytes(data[cls.HEADER.size + cells:])
+        if byteorder != (sys.byteorder == "big"):
+            dist.byteswap()
+            next_hop.byteswap()
+        return cls(graph_local, dist, next_hop)
+
+    def save(self, path):
+        """Sparar tabellen till en cachefil.
+
+        Args:
+            path (str): Sökvägen till cachefilen.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(self.HEADER.pack(self.MAGIC, self.VERSION, sys.byteorder == "big", self.size))
+            file.write(self.dist.tobytes())
+            file.write(self.next_hop.tobytes())
+        os.replace(tmp_path, path)
+
+    def cost(self, start, end):
+        """Hämtar den kortaste kostnaden mellan två städer.
+
+        Args:
+            start (str): Startstadens namn.
+            end (str): Slutstadens namn.
+
+        Returns:
+            int | None: Kostnaden, eller None om det inte finns någon väg.
+        """
+        ids = self.graph.ids
+        if start not in ids or end not in ids:
+            return None
+        cost = self.dist[ids[start] * self.size + ids[end]]
+        return None if cost == -1 else cost
+
+    def path(self, start, end):
+        """Bygger upp den kortaste vägen mellan två städer genom att följa nästa steg.
+
+        Args:
+            start (str): Startstadens namn.
+            end (str): Slutstadens namn.
+
+        Returns:
+            List[str] | None: Städerna i vägen, eller None om det inte finns någon väg.
+        """
+        ids = self.graph.ids
+        if start not in ids or end not in ids:
+            return None
+        node = ids[start]
+        target = ids[end]
+        if self.next_hop[node * self.size + target] == -1:
+            return None
+
+        names = self.graph.names
+        path = [start]
+        while node != target:
+            node = self.next_hop[node * self.size + target]
+            path.append(names[node])
+        return path
+
+    def lookup(self, start, end):
+        """Hämtar kostnad och väg i samma form som a_star.
+
+        Args:
+            start (str): Startstadens namn.
+            end (str): Slutstadens namn.
+
+        Returns:
+            Tuple[int, List[str]] | None: Kostnaden och vägen, eller None om det inte finns någon väg.
+        """
+        path = self.path(start, end)
+        if path is None:
+            return None
+        return self.cost(start, end), path
+
+
+class LSHIndex:
+    def __init__(self, graph_local, hyperplanes=None):
+        """Index som delar in städerna i grupper efter vilken sida av ett antal linjer de ligger på.
+
+        Varje stad får en kod där bit i är satt om staden ligger till vänster om linje i, dvs.
+        kryssprodukten med linjen är negativ. Den motsatta gruppen har alla bitar inverterade.
+        Indexet byggs en gång per karta, därefter är varje dragning O(1).
+
+        Args:
+            graph_local (Graph | CompactGraph): Grafen med städernas koordinater.
+            hyperplanes (List[Tuple[Tuple[float, float], Tuple[float, float]]] | None): Linjerna som
+                ((x1, y1), (x2, y2)), som standard de fyra LSH-linjerna.
+
+        Raises:
+            ValueError: Om linjerna inte delar städerna i minst två grupper. Då skulle en stad
+                kunna dras som både start och slut.
+        """
+        import numpy as np
+
+        if hyperplanes is None:
+            hyperplanes = default_hyperplanes()
+        self.hyperplanes = list(hyperplanes)
+        self.mask = (1 << len(self.hyperplanes)) - 1
+
+        names = list(graph_local.cities.keys())
+        coords = np.array([graph_local.cities[name]["coords"] for name in names], dtype=np.float64).reshape(-1, 2)
+        lines = np.array(self.hyperplanes, dtype=np.float64).reshape(-1, 2, 2)
+
+        # Kryssprodukten för alla städer och linjer på en gång, negativ betyder vänster sida
+        x1 = lines[:, 0, 0][:, None]
+        y1 = lines[:, 0, 1][:, None]
+        x2 = lines[:, 1, 0][:, None]
+        y2 = lines[:, 1, 1][:, None]
+        cross = (x2 - x1) * (coords[:, 1][None, :] - y1) - (y2 - y1) * (coords[:, 0][None, :] - x1)
+        weights = (1 << np.arange(len(self.hyperplanes), dtype=np.int64))[:, None]
+        codes = ((cross < 0) * weights).sum(axis=0) if len(self.hyperplanes) else np.zeros(len(names), np.int64)
+
+        # Grupperna i den ordning de först förekommer, så att dragningarna blir desamma som tidigare
+        self.code_of = {}
+        buckets = {}
+        for name, code in zip(names, codes.tolist()):
+            self.code_of[name] = code
+            buckets.setdefault(code, []).append(name)
+        self.buckets = {code: tuple(cities) for code, cities in buckets.items()}
+        self.codes = tuple(self.buckets)
+        if len(self.codes) < 2:
+            raise ValueError("LSH-linjerna måste dela städerna i minst två grupper")
+
+        # Finns inte den exakt motsatta gruppen används de grupper som skiljer sig i flest bitar,
+        # så att det alltid finns minst en stad att välja
+        self.opposites = {}
+        for code in self.codes:
+            opposite = code ^ self.mask
+            if opposite in self.buckets:
+                self.opposites[code] = self.buckets[opposite]
+                continue
+            farthest = max(bin(code ^ other).count("1") for other in self.codes)
+            self.opposites[code] = tuple(city for other in self.codes if bin(code ^ other).count("1") == farthest
+                                         for city in self.buckets[other])
+
+    def bucket(self, city):
+        """Hämtar städerna i samma grupp som en stad.
+
+        Args:
+            city (str): Stadens namn.
+
+        Returns:
+            Tuple[str, ...]: Städerna i gruppen.
+        """
+        return self.buckets[self.code_of[city]]
+
+    def opposite_cities(self, city):
+        """Hämtar städerna i den motsatta gruppen till en stad.
+
+        Args:
+            city (str): Stadens namn.
+
+        Returns:
+            Tuple[str, ...]: Städerna i den motsatta gruppen, aldrig tom.
+        """
+        return self.opposites[self.code_of[city]]
+
+    def sample_pair(self, rng=random):
+        """Drar ett par städer som ligger långt ifrån varandra.
+
+        En grupp väljs slumpmässigt, sedan en stad i den och en stad i den motsatta gruppen.
+
+        Args:
+            rng (random.Random): Slumpgeneratorn som används, som standard modulen random.
+
+        Returns:
+            Tuple[str, str]: Start- och slutstadens namn.
+        """
+        code = rng.choice(self.codes)
+        return rng.choice(self.buckets[code]), rng.choice(self.opposites[code])
+
+
+class RouteSampler:
+    def __init__(self, graph_local, max_steps=2000, max_attempts=20):
+        """Slumpar rutter med exakt angiven längd i tåg genom djupet-först-sökning med återspårning.
+
+        I varje steg väljs nästa stad bland de grannar som ännu inte har provats. Tar det stopp
+        backar sökningen i stället för att avbryta rutten. Antal steg och startförsök är
+        begränsade, så ett anrop tar alltid slut.
+
+        Args:
+            graph_local (Graph | CompactGraph): Grafen som rutterna slumpas i.
+            max_steps (int): Högsta antal provade förbindelser per startstad.
+            max_attempts (int): Högsta antal startstäder innan sökningen ger upp.
+        """
+        self.max_steps = max_steps
+        self.max_attempts = max_attempts
+        self.cities = tuple(graph_local.cities)
+
+        # Grannarna och avstånden för varje stad, den första länken gäller om en granne förekommer flera gånger
+        self.adjacency = {}
+        for city in self.cities:
+            links = {}
+            if isinstance(graph_local, CompactGraph):
+                for neighbor in graph_local.neighbors(city):
+                    links.setdefault(neighbor, graph_local.cost(city, neighbor)[0])
+            else:
+                for connection in graph_local.connections[city]:
+                    links.setdefault(connection["city"], connection["distance"])
+            self.adjacency[city] = tuple(links.items())
+
+        # Räknare för genomströmning och hur ofta sökningen misslyckas
+        self.routes = 0
+        self.failures = 0
+        self.attempts = 0
+        self.steps = 0
+        self.backtracks = 0
+        self.elapsed = 0.0
+
+    def sample(self, num_trains, rng=random):
+        """Slumpar en rutt vars förbindelser tillsammans är exakt `num_trains + rng.randrange(0, 4)` tåg långa.
+
+        Hittas ingen sådan rutt inom gränserna returneras den längsta rutt som hittades, och
+        anropet räknas som ett misslyckande.
+
+        Args:
+            num_trains (int): Antal tåg att använda i rutten.
+            rng (random.Random): Slumpgeneratorn som används, som standard modulen random.
+
+        Returns:
+            List[str]: Lista över städer i rutten.
+        """
+        start_time = time.perf_counter()
+        target = num_trains + rng.randrange(0, 4)
+        adjacency = self.adjacency
+        best_route = None
+        best_length = -1
+
+        for _ in range(self.max_attempts):
+            self.attempts += 1
+            route = [rng.choice(self.cities)]
+            visited = {route[0]}
+            lengths = []  # Avståndet för varje förbindelse i rutten
+            length = 0
+            remaining = [list(adjacency[route[0]])]  # Grannar som inte har provats, per stad i rutten
+            steps = 0
+
+            while remaining:
+                # Målet kontrolleras före steggränsen, så att en rutt som når målet i sista steget räknas
+                if length == target:
+                    self.routes += 1
+                    self.steps += steps
+                    self.elapsed += time.perf_counter() - start_time
+                    return route
+                if steps >= self.max_steps:
+                    break
+
+                candidates = remaining[-1]
+                if not candidates:
+                    # Återvändsgränd, backar en stad
+                    remaining.pop()
+                    if len(route) > 1:
+                        visited.discard(route.pop())
+                        length -= lengths.pop()
+                        self.backtracks += 1
+                    continue
+
+                # Väljer en slumpmässig granne som inte har provats och tar bort den från kandidaterna
+                index = rng.randrange(len(candidates))
+                candidates[index], candidates[-1] = candidates[-1], candidates[index]
+                city, distance = candidates.pop()
+                steps += 1
+                if city in visited or length + distance > target:
+                    continue
+
+                route.append(city)
+                visited.add(city)
+                lengths.append(distance)
+                length += distance
+                remaining.append(list(adjacency[city]))
+                if length > best_length:
+                    best_route = list(route)
+                    best_length = length
+
+            self.steps += steps
+
+        self.routes += 1
+        self.failures += 1
+        self.elapsed += time.perf_counter() - start_time
+        return best_route or [rng.choice(self.cities)]
+
+    def stats(self):
+        """Hämtar räknarna för samplern.
+
+        Returns:
+            dict: Antal rutter, misslyckanden, andel misslyckanden, startförsök, steg, återspårningar
+            och rutter per sekund.
+        """
+        return {
+            "routes": self.routes,
+            "failures": self.failures,
+            "failure_rate": self.failures / self.routes if self.routes else 0.0,
+            "attempts": self.attempts,
+            "steps": self.steps,
+            "backtracks": self.backtracks,
+            "routes_per_second": self.routes / self.elapsed if self.elapsed else 0.0,
+        }
+
+
+# =================
+# Funktioner
+
+def route_creater(num_trains, rng=random):
+    """Skapar en rutt och beräknar dess information inklusive kortaste vägen och poäng.
+    
+    Args:
+        num_trains (int): Antal tåg att använda i rutten.
+        rng (random.Random): Slumpgeneratorn som används, som standard modulen random.
+
+    Returns:
+        dict: Information om rutten inklusive koordinater och poäng.
+    """
+    info_route = {}
+    route = route_planner(num_trains, rng)
+    info_route["route"] = route
+
+    route_coords = travel_coords(route)
+    info_route["route_coords"] = route_coords
+
+    shortest_cost, shortest_path = a_star(route[0], route[-1], compact_graph)
+    info_route["shortest_cost"] = shortest_cost
+    info_route["shortest_path"] = shortest_path
+
+    shortest_route_coords = travel_coords(shortest_path)
+    info_route["shortest_route_coords"] = shortest_route_coords
+
+    info_route["points"] = calculate_points(route_coords[0], route_coords[-1], shortest_cost, rng)
+
+    return info_route
+
+
+def route_planner(num_trains, rng=random):
+    """Planerar en rutt slumpmässigt baserat på antal tåg.
+
+    Rutten är exakt `num_trains + rng.randrange(0, 4)` tåg lång, se RouteSampler.
+    
+    Args:
+        num_trains (int): Antal tåg att använda i rutten.
+        rng (random.Random): Slumpgeneratorn som används, som standard modulen random.
+
+    Returns:
+        List[str]: Lista över städer i rutten.
+    """
+    return route_sampler().sample(num_trains, rng)
+
+
+def route_sampler():
+    """Hämtar ruttsamplern för kartan och bygger den första gången.
+
+    Returns:
+        RouteSampler: Samplern för `graph`.
+    """
+    global _route_sampler
+    if _route_sampler is None:
+        _route_sampler = RouteSampler(graph)
+    return _route_sampler
+
+
+def travel_coords(travel_route):
+    """Hämtar koordinaterna för en given resrutt.
+    
+    Args:
+        travel_route (List[str]): Lista över städer i rutten.
+
+    Returns:
+        List[Tuple[int, int]]: Lista över koordinater för rutten.
+    """
+    route_coords_local = []
+
+    for i in range(len(travel_route)):
+        route_coords_local.append(graph.cities[travel_route[i]]['coords'])
+    return route_coords_local
+
+
+def a_star(start, end, graph_local, use_heuristic=True, return_expansions=False):
+    """A* algoritm för att hitta den kortaste vägen mellan två städer.
+
+    Heuristiken är det raka pixelavståndet till målet gånger grafens kalibrerade skala
+    (se `heuristic_scale`), så den överskattar aldrig och vägen blir alltid kortast.
+    Vägen byggs upp från föräldrapekare när målet nås.
+    Har en CompactGraph en `path_table` används den i stället för att söka.
+
+    Args:
+        start (str): Startstadens namn.
+        end (str): Slutstadens namn.
+        graph_local (Graph | CompactGraph): Grafen som representerar städer och deras förbindelser.
+        use_heuristic (bool): Om False körs sökningen utan heuristik (Dijkstra).
+        return_expansions (bool): Om True returneras även antalet expanderade städer.
+
+    Returns:
+        Tuple[int, List[str]]: Kostnaden och vägen mellan start och slut, med antalet
+        expanderade städer som tredje värde om `return_expansions` är satt. None om
+        det inte finns någon väg.
+    """
+    if isinstance(graph_local, CompactGraph) and graph_local.path_table is not None:
+        # Förberäknad tabell, ingen sökning behövs
+        result = graph_local.path_table.lookup(start, end)
+        if result is None:
+            return None
+        return result + (0,) if return_expansions else result
+
+    if isinstance(graph_local, CompactGraph):
+        result = _a_star_compact(start, end, graph_local, use_heuristic)
+    else:
+        result = _a_star_graph(start, end, graph_local, use_heuristic)
+
+    cost, path, expansions = result
+    if path is None:
+        return None
+    if return_expansions:
+        return cost, path, expansions
+    return cost, path
+
+
+def _calibrate_heuristic(edges):
+    """Beräknar den största skalan där skala * pixelavstånd aldrig överstiger kantens avstånd.
+
+    Args:
+        edges (Iterable[Tuple[Tuple[int, int], Tuple[int, int], int]]): Kanter som (koordinater, koordinater, avstånd).
+
+    Returns:
+        float: Skalan, eller 0 om det inte finns några kanter.
+    """
+    if edges is None:
+        return 0.0
+    scale = None
+    for coords_a, coords_b, distance in edges:
+        euclidean_dist = math.dist(coords_a, coords_b)
+        if euclidean_dist == 0:
+            continue
+        ratio = distance / euclidean_dist
+        if scale is None or ratio < scale:
+            scale = ratio
+    return max(scale or 0.0, 0.0)
+
+
+def _a_star_graph(start, end, graph_local, use_heuristic):
+    """A* på en Graph med stadsnamn som noder.
+
+    Returns:
+        Tuple[int, List[str], int]: Kostnad, väg (None om ingen finns) och antal expansioner.
+    """
+    scale = graph_local.heuristic_scale() if use_heuristic else 0.0
+    cities = graph_local.cities
+    if scale and end in cities:
+        goal = cities[end]["coords"]
+        heuristic = lambda city: scale * math.dist(cities[city]["coords"], goal)
+    else:
+        heuristic = lambda city: 0
+
+    best = {start: 0}
+    parents = {start: None}
+    heap = [(heuristic(start), 0, start)]
+    visited = set()
+    expansions = 0
+    while heap:
+        (_, cost, node) = heapq.heappop(heap)
+        if node in visited:
+            continue
+        if node == end:
+            return cost, _reconstruct_path(parents, end), expansions
+        visited.add(node)
+        expansions += 1
+        for neighbor in graph_local.neighbors(node):
+            if neighbor in visited:
+                continue
+            distance, neighbor_name = graph_local.cost(node, neighbor)
+            new_cost = cost + distance
+            if new_cost < best.get(neighbor_name, math.inf):
+                best[neighbor_name] = new_cost
+                parents[neighbor_name] = node
+                heapq.heappush(heap, (new_cost + heuristic(neighbor_name), new_cost, neighbor_name))
+    return None, None, expansions
+
+
+def _a_star_compact(start, end, graph_local, use_heuristic):
+    """A* på en CompactGraph med heltals-ID och CSR-arrayerna.
+
+    Returns:
+        Tuple[int, List[str], int]: Kostnad, väg (None om ingen finns) och antal expansioner.
+    """
+    scale = graph_local.heuristic_scale() if use_heuristic else 0.0
+    source = graph_local.ids.get(start)
+    target = graph_local.ids.get(end)
+    if source is None or target is None:
+        return None, None, 0
+
+    offsets = graph_local.offsets
+    targets = graph_local.targets
+    distances = graph_local.distances
+    xs = graph_local.xs
+    ys = graph_local.ys
+    goal_x = xs[target]
+    goal_y = ys[target]
+    hypot = math.hypot
+
+    best = {source: 0}
+    parents = {source: None}
+    heap = [(scale * hypot(xs[source] - goal_x, ys[source] - goal_y), 0, source)]
+    visited = set()
+    expansions = 0
+    while heap:
+        (_, cost, node) = heapq.heappop(heap)
+        if node in visited:
+            continue
+        if node == target:
+            names = graph_local.names
+            return cost, [names[city_id] for city_id in _reconstruct_path(parents, target)], expansions
+        visited.add(node)
+        expansions += 1
+        for edge in range(offsets[node], offsets[node + 1]):
+            neighbor = targets[edge]
+            if neighbor in visited:
+                continue
+            new_cost = cost + distances[edge]
+            if new_cost < best.get(neighbor, math.inf):
+                best[neighbor] = new_cost
+                parents[neighbor] = node
+                estimate = scale * hypot(xs[neighbor] - goal_x, ys[neighbor] - goal_y) if scale else 0
+                heapq.heappush(heap, (new_cost + estimate, new_cost, neighbor))
+    return None, None, expansions
+
+
+def _reconstruct_path(parents, end):
+    """Bygger upp vägen från start till slut genom att följa föräldrapekarna baklänges.
+
+    Args:
+        parents (dict): Föräldern för varje nådd nod, None för startnoden.
+        end: Slutnoden.
+
+    Returns:
+        List: Noderna i vägen från start till slut.
+    """
+    path = []
+    node = end
+    while node is not None:
+        path.append(node)
+        node = parents[node]
+    path.reverse()
+    return path
+
+
+def start_game(num_trains, num_routes, rng=random):
+    """Startar spelet och genererar rutter.
+    
+    Args:
+        num_trains (int): Antal tåg att använda i varje rutt.
+        num_routes (int): Antal rutter att generera.
+        rng (random.Random): Slumpgeneratorn som används, som standard modulen random.
+
+    Returns:
+        List[dict]: Lista över information om varje rutt.
+    """
+    list_routes = []
+
+    for i in range(num_routes):
+        list_routes.append(route_creater(num_trains, rng))
+
+    return list_routes
+
+
+def calculate_points(pointA, pointB, trains_used, rng=random):
+    """Beräknar poängen för en rutt baserat på avstånd och antal använda tåg.
+    
+    Args:
+        pointA (Tuple[int, int]): Startpunktens koordinater.
+        pointB (Tuple[int, int]): Slutpunktens koordinater.
+        trains_used (int): Antal använda tåg.
+        rng (random.Random): Slumpgeneratorn som används, som standard modulen random.
+
+    Returns:
+        int: Poängen för rutten.
+    """
+    points = 0
+    euclidean_dist = math.dist(pointA, pointB)
+    points += math.sqrt(euclidean_dist) / 7
+    points += trains_used / 2
+    points += rng.randrange(0, 3)
+
+    points = points.__floor__()
+
+    return points
+
+
+def lsh(rng=random):
+    """LSH-algoritm för att kategorisera städer och välja start- och slutstad för en lång rutt.
+
+    Args:
+        rng (random.Random): Slumpgeneratorn som används, som standard modulen random.
+
+    Returns:
+        Tuple[str, str]: Start- och slutstadens namn.
+    """
+    return lsh_index().sample_pair(rng)
+
+
+def lsh_index():
+    """Hämtar LSH-indexet för kartan och bygger det första gången.
+
+    Returns:
+        LSHIndex: Indexet för `graph` med de fyra LSH-linjerna.
+    """
+    global _lsh_index
+    if _lsh_index is None:
+        _lsh_index = LSHIndex(graph)
+    return _lsh_index
+
+
+def default_hyperplanes():
+    """Hämtar de fyra LSH-linjerna som kartan delas in efter.
+
+    Den röda linjen vänds så att städer till vänster om mitten räknas som vänster sida.
+
+    Returns:
+        List[Tuple[Tuple[float, float], Tuple[float, float]]]: Linjerna.
+    """
+    return [LSH_BLUE_COORDS, LSH_GREEN_COORDS, LSH_YELLOW_COORDS, (LSH_RED_COORDS[1], LSH_RED_COORDS[0])]
+
+
+def even_hyperplanes(count, width=I_WIDTH, height=I_HEIGHT):
+    """Skapar linjer genom kartans mitt med jämnt fördelade vinklar.
+
+    Args:
+        count (int): Antal linjer.
+        width (float): Kartans bredd.
+        height (float): Kartans höjd.
+
+    Returns:
+        List[Tuple[Tuple[float, float], Tuple[float, float]]]: Linjerna.
+    """
+    center_x = width / 2
+    center_y = height / 2
+    lines = []
+    for i in range(count):
+        angle = math.pi * i / count
+        lines.append(((center_x, center_y), (center_x + math.cos(angle), center_y + math.sin(angle))))
+    return lines
+
+
+def long_route(rng=random):
+    """Skapar en lång rutt mellan två städer som valts med LSH-algoritmen.
+
+    Args:
+        rng (random.Random): Slumpgeneratorn som används, som standard modulen random.
+
+    Returns:
+        List[dict]: Lista med information om den långa rutten.
+    """
+    list_routes = []
+    list_routes_dict = {}
+
+    start_city, end_city = lsh(rng)
+    shortest_cost, shortest_path = a_star(start_city, end_city, compact_graph)
+
+    list_routes_dict['route'] = shortest_path
+    list_routes_dict['shortest_route_coords'] = travel_coords(shortest_path)
+    list_routes_dict['route_coords'] = travel_coords(shortest_path)
+
+    list_routes.append(list_routes_dict)
+
+    return list_routes
+
+
+def load_map_source(path):
+    """Läser en karta i källformatet, JSON eller TOML beroende på filändelsen.
+
+    Formatet är ett objekt med "name", "width", "height" och en lista "cities", där varje stad
+    har "name", "coords" ([x, y]) och "links" ([[stad, avstånd, vikt], ...]), alltså samma
+    fält som Graph.add_city tar.
+
+    Args:
+        path (str): Sökvägen till kartfilen.
+
+    Returns:
+        dict: Kartan.
+    """
+    if path.endswith(".toml"):
+        import tomllib
+        with open(path, "rb") as file:
+            return tomllib.load(file)
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def load_graph(path, graph_local=None):
+    """Läser en karta i källformatet och lägger till dess städer i en graf.
+
+    Args:
+        path (str): Sökvägen till kartfilen.
+        graph_local (Graph | CompactGraph | None): Grafen att fylla, som standard en ny Graph.
+
+    Returns:
+        Graph | CompactGraph: Grafen.
+    """
+    if graph_local is None:
+        graph_local = Graph()
+    for city in load_map_source(path)["cities"]:
+        graph_local.add_city(city["name"], tuple(city["coords"]), [tuple(link) for link in city["links"]])
+    return graph_local
+
+
+def load_default_map(source_path=EUROPE_MAP, compiled_path=EUROPE_COMPILED_MAP):
+    """Läser kartan som spelet använder, från den kompilerade filen om det går.
+
+    Den kompilerade filen minnesmappas (se mapfile.load_compiled) och används om den finns och är
+    nyare än källfilen. Annars, eller om filen inte går att läsa, läses källfilen med load_graph.
+
+    Args:
+        source_path (str): Kartan i källformatet.
+        compiled_path (str): Den kompilerade kartan.
+
+    Returns:
+        Tuple[Graph | CompactGraph, CompactGraph]: Grafen och dess kompakta form. Med den kompilerade
+        kartan är båda samma CompactGraph.
+    """
+    if os.path.exists(compiled_path) and os.path.getmtime(compiled_path) >= os.path.getmtime(source_path):
+        try:
+            # mapfile importerar core och importeras därför först här. Importerades mapfile före core
+            # är den inte färdigladdad än och då används källfilen.
+            from mapfile import load_compiled
+            compiled = load_compiled(compiled_path)
+        except (ImportError, ValueError, struct.error):
+            pass
+        else:
+            return compiled, compiled
+    graph_local = load_graph(source_path)
+    return graph_local, graph_local.compact()
+
+
+def use_path_table(cache_dir=PATH_CACHE_DIR):
+    """Kopplar en förberäknad kortaste-vägen-tabell till den kompakta grafen.
+
+    Tabellen läses från cachen om den finns. Efter anropet svarar a_star med tabellen.
+
+    Args:
+        cache_dir (str): Katalogen för cachefilerna.
+
+    Returns:
+        ShortestPathTable: Tabellen som kopplades in.
+    """
+    compact_graph.path_table = ShortestPathTable.load_or_build(compact_graph, cache_dir)
+    return compact_graph.path_table
+
+
+# =================
+# Kartan läses från maps/europe.ttrmap om den är kompilerad och aktuell, annars från maps/europe.json
+
+# Den kompakta grafen används vid vägsökning, se use_path_table för den förberäknade tabellen
+graph, compact_graph = load_default_map()
+
+
+# =================
+
+# (x1, x2), (y1, y2)
+# LSH-koordinater för att kategorisera städer
+LSH_BLUE_COORDS = ((0, 0), (I_WIDTH, I_HEIGHT))
+LSH_GREEN_COORDS = ((0, I_HEIGHT/2), (I_WIDTH, I_HEIGHT/2))
+LSH_YELLOW_COORDS = ((0, I_HEIGHT), (I_WIDTH, 0))
+LSH_RED_COORDS = ((I_WIDTH/2, 0), (I_WIDTH/2, 760))
+
+# Byggs första gången lsh() anropas, se lsh_index
+_lsh_index = None
+
+# Byggs första gången route_planner() anropas, se route_sampler
+_route_sampler = None
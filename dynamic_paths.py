@@ -0,0 +1,270 @@
+"""Kortaste vägar som hålls uppdaterade när förbindelser blockeras eller får nya vikter.
+
+För varje startstad som har frågats efter sparas avstånd och föregångare (ett kortaste-vägen-träd).
+När en kant blir billigare sprids förbättringen från kantens slutstad som i Dijkstra, men bara till
+de städer som faktiskt får kortare avstånd. När en kant blir dyrare eller blockeras påverkas bara
+städerna under kanten i trädet. De får nya avstånd från sina opåverkade grannar och en Dijkstra som
+bara rör dem. Startstäder vars träd inte använder kanten rörs inte alls.
+"""
+import heapq
+
+INF = float("inf")
+
+
+class DynamicShortestPaths:
+    def __init__(self, graph_local, validate=False):
+        """Skapar strukturen för en karta med kartans egna avstånd som vikter.
+
+        Args:
+            graph_local (CompactGraph): Kartan.
+            validate (bool): Om True kontrolleras varje svar mot en vanlig Dijkstra från början.
+        """
+        self.graph = graph_local
+        self.validate = validate
+        num_cities = len(graph_local)
+        offsets = graph_local.offsets
+        targets = graph_local.targets
+
+        self.weights = list(graph_local.distances)  # Aktuell vikt per kant, INF om den är blockerad
+        self._out = [[(targets[edge], edge) for edge in range(offsets[city], offsets[city + 1])]
+                     for city in range(num_cities)]
+        self._in = [[] for _ in range(num_cities)]
+        self._edges = {}  # (från, till) -> kanternas index, kartan kan ha parallella kanter
+        for city, edges in enumerate(self._out):
+            for target, edge in edges:
+                self._in[target].append((city, edge))
+                self._edges.setdefault((city, target), []).append(edge)
+
+        self._dist = {}  # startstad -> avstånd till varje stad
+        self._parent = {}  # startstad -> föregångare för varje stad, -1 om ingen
+
+        self.queries = 0
+        self.rows_built = 0
+        self.updates = 0
+        self.rows_updated = 0
+        self.nodes_touched = 0  # Städer som fått nytt avstånd vid uppdateringar
+        self.validations = 0
+
+    # =================
+    # Vikter
+
+    def set_weight(self, a_id, b_id, weight):
+        """Ändrar vikten för kanterna från en stad till en annan.
+
+        Args:
+            a_id (int): Startstadens id.
+            b_id (int): Slutstadens id.
+            weight (int | None): Den nya vikten, None för att blockera kanten.
+        """
+        weight = INF if weight is None else weight
+        for edge in self._edges.get((a_id, b_id), ()):
+            old = self.weights[edge]
+            if old == weight:
+                continue
+            self.weights[edge] = weight
+            self.updates += 1
+            for source in self._dist:
+                if weight < old:
+                    self._decrease(source, a_id, b_id, weight)
+                else:
+                    self._increase(source, a_id, b_id)
+
+    def set_route_weight(self, a_id, b_id, weight):
+        """Ändrar vikten för en förbindelse i båda riktningarna.
+
+        Args:
+            a_id (int): Första stadens id.
+            b_id (int): Andra stadens id.
+            weight (int | None): Den nya vikten, None för att blockera förbindelsen.
+        """
+        self.set_weight(a_id, b_id, weight)
+        self.set_weight(b_id, a_id, weight)
+
+    def block(self, a_id, b_id):
+        """Blockerar en förbindelse i båda riktningarna.
+
+        Args:
+            a_id (int): Första stadens id.
+            b_id (int): Andra stadens id.
+        """
+        self.set_route_weight(a_id, b_id, None)
+
+    def _decrease(self, source, a_id, b_id, weight):
+        """Sprider ett kortare avstånd genom kanten a -> b, bara till städer som får kortare väg."""
+        dist = self._dist[source]
+        parent = self._parent[source]
+        candidate = dist[a_id] + weight
+        if candidate >= dist[b_id]:
+            return
+        dist[b_id] = candidate
+        parent[b_id] = a_id
+        self.rows_updated += 1
+
+        heap = [(candidate, b_id)]
+        while heap:
+            distance, city = heapq.heappop(heap)
+            if distance > dist[city]:
+                continue
+            self.nodes_touched += 1
+            for neighbor, edge in self._out[city]:
+                new_distance = distance + self.weights[edge]
+                if new_distance < dist[neighbor]:
+                    dist[neighbor] = new_distance
+                    parent[neighbor] = city
+                    heapq.heappush(heap, (new_distance, neighbor))
+
+    def _increase(self, source, a_id, b_id):
+        """Räknar om avstånden under kanten a -> b i trädet när kanten blivit dyrare."""
+        dist = self._dist[source]
+        parent = self._parent[source]
+        if parent[b_id] != a_id:
+            # Kanten används inte i trädet, inga avstånd ändras
+            return
+
+        children = [[] for _ in dist]
+        for city, city_parent in enumerate(parent):
+            if city_parent != -1:
+                children[city_parent].append(city)
+        affected = []
+        stack = [b_id]
+        while stack:
+            city = stack.pop()
+            affected.append(city)
+            stack.extend(children[city])
+        affected_set = set(affected)
+
+        # Varje påverkad stad får sitt bästa avstånd via en opåverkad granne
+        heap = []
+        for city in affected:
+            best = INF
+            best_parent = -1
+            for neighbor, edge in self._in[city]:
+                if neighbor not in affected_set and dist[neighbor] + self.weights[edge] < best:
+                    best = dist[neighbor] + self.weights[edge]
+                    best_parent = neighbor
+            dist[city] = best
+            parent[city] = best_parent
+            if best < INF:
+                heap.append((best, city))
+        heapq.heapify(heap)
+        self.rows_updated += 1
+
+        while heap:
+            distance, city = heapq.heappop(heap)
+            if distance > dist[city]:
+                continue
+            self.nodes_touched += 1
+            for neighbor, edge in self._out[city]:
+                new_distance = distance + self.weights[edge]
+                if new_distance < dist[neighbor]:
+                    dist[neighbor] = new_distance
+                    parent[neighbor] = city
+                    heapq.heappush(heap, (new_distance, neighbor))
+
+    # =================
+    # Frågor
+
+    def dijkstra(self, source):
+        """Beräknar avstånden från en stad med en vanlig Dijkstra och de aktuella vikterna.
+
+        Args:
+            source (int): Startstadens id.
+
+        Returns:
+            Tuple[List[float], List[int]]: Avstånd och föregångare för varje stad.
+        """
+        dist = [INF] * len(self._out)
+        parent = [-1] * len(self._out)
+        dist[source] = 0
+        heap = [(0, source)]
+        while heap:
+            distance, city = heapq.heappop(heap)
+            if distance > dist[city]:
+                continue
+            for neighbor, edge in self._out[city]:
+                new_distance = distance + self.weights[edge]
+                if new_distance < dist[neighbor]:
+                    dist[neighbor] = new_distance
+                    parent[neighbor] = city
+                    heapq.heappush(heap, (new_distance, neighbor))
+        return dist, parent
+
+    def _row(self, source):
+        """Hämtar avstånden från en stad och beräknar dem första gången."""
+        dist = self._dist.get(source)
+        if dist is None:
+            dist, self._parent[source] = self.dijkstra(source)
+            self._dist[source] = dist
+            self.rows_built += 1
+        return dist
+
+    def distance(self, start_id, end_id):
+        """Hämtar det kortaste avståndet mellan två städer med de aktuella vikterna.
+
+        Args:
+            start_id (int): Startstadens id.
+            end_id (int): Slutstadens id.
+
+        Returns:
+            int | None: Avståndet, None om det inte finns någon väg.
+
+        Raises:
+            RuntimeError: Om kontrolläget är på och svaret skiljer sig från en vanlig Dijkstra.
+        """
+        self.queries += 1
+        distance = self._row(start_id)[end_id]
+        if self.validate:
+            self.validations += 1
+            expected = self.dijkstra(start_id)[0][end_id]
+            if expected != distance:
+                raise RuntimeError(f"Fel avstånd från {start_id} till {end_id}: {distance}, Dijkstra ger {expected}")
+        return None if distance == INF else distance
+
+    def path(self, start_id, end_id):
+        """Hämtar en kortaste väg mellan två städer med de aktuella vikterna.
+
+        Args:
+            start_id (int): Startstadens id.
+            end_id (int): Slutstadens id.
+
+        Returns:
+            List[int] | None: Städernas id längs vägen, None om det inte finns någon väg.
+        """
+        if self.distance(start_id, end_id) is None:
+            return None
+        parent = self._parent[start_id]
+        path = [end_id]
+        while path[-1] != start_id:
+            path.append(parent[path[-1]])
+        path.reverse()
+        return path
+
+    def copy(self):
+        """Kopierar vikterna och de beräknade avstånden. Kartan och grannlistorna delas.
+
+        Returns:
+            DynamicShortestPaths: En oberoende kopia.
+        """
+        other = DynamicShortestPaths.__new__(DynamicShortestPaths)
+        other.__dict__.update(self.__dict__)
+        other.weights = list(self.weights)
+        other._dist = {source: list(dist) for source, dist in self._dist.items()}
+        other._parent = {source: list(parent) for source, parent in self._parent.items()}
+        return other
+
+    def stats(self):
+        """Hämtar statistik för frågor och uppdateringar.
+
+        Returns:
+            dict: Antal frågor, beräknade startstäder, ändrade kanter, uppdaterade startstäder,
+            städer som fått nytt avstånd och kontroller.
+        """
+        return {
+            "queries": self.queries,
+            "rows_built": self.rows_built,
+            "rows": len(self._dist),
+            "updates": self.updates,
+            "rows_updated": self.rows_updated,
+            "nodes_touched": self.nodes_touched,
+            "validations": self.validations,
+        }
@@ -0,0 +1,484 @@
+"""Spelets tillstånd utan pygame: vilka förbindelser spelarna har tagit, tåg, kort och biljetter.
+
+Varje spelare har en union-find över städerna, så att en biljett kan kontrolleras i nästan
+konstant tid och poängen uppdateras direkt när en förbindelse tas.
+"""
+import random
+from array import array
+
+import core
+from dynamic_paths import DynamicShortestPaths
+from longest_route import LongestRouteSolver
+
+# Poäng för en förbindelse efter dess längd i tåg
+ROUTE_POINTS = {1: 1, 2: 2, 3: 4, 4: 7, 5: 10, 6: 15, 7: 18, 8: 21}
+
+# Kortleken: åtta färger med tolv kort var och fjorton lok som kan ersätta vilken färg som helst
+CARD_COLORS = ("purple", "white", "blue", "yellow", "orange", "black", "red", "green")
+LOCOMOTIVE = len(CARD_COLORS)
+CARDS_PER_COLOR = 12
+LOCOMOTIVES = 14
+
+START_TRAINS = 45
+START_HAND = 4
+
+# Bonus till spelaren (eller spelarna) med längst sammanhängande tåg
+LONGEST_ROUTE_BONUS = 10
+
+# Spelet går mot sitt slut när en spelare har så här få tåg kvar
+LAST_ROUND_TRAINS = 2
+
+
+def claimable_routes(graph_local):
+    """Hämtar förbindelserna som kan tas, en per par av städer oavsett riktning. Öglor hoppas över.
+
+    Args:
+        graph_local (CompactGraph): Grafen.
+
+    Returns:
+        List[Tuple[int, int, int]]: Förbindelserna som (stad, stad, längd) med städernas id.
+    """
+    routes = []
+    seen = set()
+    offsets = graph_local.offsets
+    targets = graph_local.targets
+    distances = graph_local.distances
+    for city_id in range(len(graph_local)):
+        for edge in range(offsets[city_id], offsets[city_id + 1]):
+            # En förbindelse från en stad till sig själv ger ingen väg och kan inte tas
+            if city_id == targets[edge]:
+                continue
+            key = (min(city_id, targets[edge]), max(city_id, targets[edge]))
+            if key not in seen:
+                seen.add(key)
+                routes.append((city_id, targets[edge], distances[edge]))
+    return routes
+
+
+class PlayerState:
+    def __init__(self, num_cities, trains=START_TRAINS):
+        """Tillståndet för en spelare.
+
+        Args:
+            num_cities (int): Antal städer i grafen.
+            trains (int): Antal tåg spelaren börjar med.
+        """
+        self.trains = trains
+        self.hand = [0] * (LOCOMOTIVE + 1)  # Antal kort per färg, lok sist
+        self.routes = []  # Id för förbindelserna spelaren har tagit
+        self.route_points = 0
+
+        # Biljetterna som (start, slut, poäng) med städernas id
+        self.tickets = []
+        self.completed = []  # Om biljetten med samma index är klar
+        self.ticket_points = 0  # Poäng för klara biljetter
+        self.open_points = 0  # Poäng för biljetter som inte är klara än
+
+        # Union-find över städerna, och vilka ofärdiga biljetter som berör varje komponent
+        self.parent = array("l", range(num_cities))
+        self.size = array("l", [1]) * num_cities
+        self.pending = {}  # rot -> index för ofärdiga biljetter med en ände i komponenten
+
+    def find(self, city_id):
+        """Hittar roten för en stads komponent med vägkomprimering (halvering).
+
+        Args:
+            city_id (int): Stadens id.
+
+        Returns:
+            int: Rotens id.
+        """
+        parent = self.parent
+        while parent[city_id] != city_id:
+            parent[city_id] = parent[parent[city_id]]
+            city_id = parent[city_id]
+        return city_id
+
+    def connected(self, a_id, b_id):
+        """Avgör om två städer hänger ihop via spelarens förbindelser.
+
+        Args:
+            a_id (int): Första stadens id.
+            b_id (int): Andra stadens id.
+
+        Returns:
+            bool: True om städerna ligger i samma komponent.
+        """
+        return self.find(a_id) == self.find(b_id)
+
+    def union(self, a_id, b_id):
+        """Slår ihop två städers komponenter och markerar biljetter som blir klara.
+
+        Bara biljetterna i den mindre komponentens lista behöver kontrolleras.
+
+        Args:
+            a_id (int): Första stadens id.
+            b_id (int): Andra stadens id.
+
+        Returns:
+            int: Poäng för biljetter som blev klara.
+        """
+        root_a = self.find(a_id)
+        root_b = self.find(b_id)
+        if root_a == root_b:
+            return 0
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+
+        pending_a = self.pending.pop(root_a, [])
+        pending_b = self.pending.pop(root_b, [])
+        if len(pending_a) < len(pending_b):
+            pending_a, pending_b = pending_b, pending_a
+
+        gained = 0
+        remaining = [index for index in pending_a if not self.completed[index]]
+        for index in pending_b:
+            if self.completed[index]:
+                continue
+            start, end, points = self.tickets[index]
+            if self.find(start) == self.find(end):
+                self.completed[index] = True
+                gained += points
+            else:
+                remaining.append(index)
+        if remaining:
+            self.pending[root_a] = remaining
+
+        self.ticket_points += gained
+        self.open_points -= gained
+        return gained
+
+    def add_ticket(self, start_id, end_id, points):
+        """Ger spelaren en biljett.
+
+        Args:
+            start_id (int): Startstadens id.
+            end_id (int): Slutstadens id.
+            points (int): Biljettens poäng.
+
+        Returns:
+            bool: True om biljetten redan är klar.
+        """
+        index = len(self.tickets)
+        self.tickets.append((start_id, end_id, points))
+        if self.connected(start_id, end_id):
+            self.completed.append(True)
+            self.ticket_points += points
+            return True
+
+        self.completed.append(False)
+        self.open_points += points
+        for root in {self.find(start_id), self.find(end_id)}:
+            self.pending.setdefault(root, []).append(index)
+        return False
+
+    @property
+    def score(self):
+        """int: Poängen just nu, förbindelser och klara biljetter."""
+        return self.route_points + self.ticket_points
+
+    @property
+    def final_score(self):
+        """int: Poängen vid spelets slut, där ofärdiga biljetter dras av."""
+        return self.route_points + self.ticket_points - self.open_points
+
+    def copy(self):
+        """Kopierar spelarens tillstånd.
+
+        Returns:
+            PlayerState: En oberoende kopia.
+        """
+        other = PlayerState.__new__(PlayerState)
+        other.trains = self.trains
+        other.hand = list(self.hand)
+        other.routes = list(self.routes)
+        other.route_points = self.route_points
+        other.tickets = list(self.tickets)
+        other.completed = list(self.completed)
+        other.ticket_points = self.ticket_points
+        other.open_points = self.open_points
+        other.parent = array("l", self.parent)
+        other.size = array("l", self.size)
+        other.pending = {root: list(indices) for root, indices in self.pending.items()}
+        return other
+
+
+class GameState:
+    def __init__(self, graph_local=None, num_players=2, seed=None, trains=START_TRAINS, hand_size=START_HAND,
+                 validate_paths=False):
+        """Tillståndet för ett helt parti.
+
+        Turordningen hålls av den som spelar partiet, se selfplay.play_game.
+
+        Args:
+            graph_local (CompactGraph | None): Kartan, som standard core.compact_graph.
+            num_players (int): Antal spelare.
+            seed (int | None): Fröet för kortleken.
+            trains (int): Antal tåg per spelare.
+            hand_size (int): Antal kort varje spelare börjar med.
+            validate_paths (bool): Kontrollerar spelarnas kortaste vägar mot en vanlig Dijkstra, se player_paths.
+        """
+        self.graph = graph_local or core.compact_graph
+        self.routes = claimable_routes(self.graph)
+        self.route_index = {(min(a, b), max(a, b)): route_id for route_id, (a, b, _) in enumerate(self.routes)}
+        self.route_owner = [-1] * len(self.routes)  # Spelaren som har tagit förbindelsen, -1 om ingen
+        self.longest_solver = LongestRouteSolver(self.routes)
+        self.rng = random.Random(seed)
+
+        self.deck = [color for color in range(len(CARD_COLORS)) for _ in range(CARDS_PER_COLOR)]
+        self.deck += [LOCOMOTIVE] * LOCOMOTIVES
+        self.rng.shuffle(self.deck)
+        self.discard = []
+
+        num_cities = len(self.graph)
+        self.players = [PlayerState(num_cities, trains) for _ in range(num_players)]
+        for player in range(num_players):
+            for _ in range(hand_size):
+                self.draw_card(player)
+
+        self.validate_paths = validate_paths
+        self._paths = [None] * num_players  # Kortaste vägar per spelare, skapas första gången de behövs
+        self._paths_shared = [False] * num_players  # Vägarna delas med en kopia och måste kopieras innan de ändras
+        self._path_changes = [[] for _ in range(num_players)]  # Dragna förbindelser som inte lagts in i vägarna än
+
+    def draw_card(self, player):
+        """Drar ett kort från leken till en spelares hand. Är leken slut blandas slänghögen.
+
+        Args:
+            player (int): Spelarens nummer.
+
+        Returns:
+            int | None: Kortets färg, None om det inte finns några kort kvar.
+        """
+        if not self.deck:
+            if not self.discard:
+                return None
+            self.deck = self.discard
+            self.discard = []
+            self.rng.shuffle(self.deck)
+        card = self.deck.pop()
+        self.players[player].hand[card] += 1
+        return card
+
+    def _payment(self, player, route_id, color):
+        """Beräknar vilka kort en spelare betalar med för en förbindelse.
+
+        Returns:
+            Tuple[int, int] | None: Antal kort av färgen och antal lok, None om spelaren inte kan ta förbindelsen.
+        """
+        if self.route_owner[route_id] != -1:
+            return None
+        length = self.routes[route_id][2]
+        state = self.players[player]
+        if state.trains < length:
+            return None
+        colored = min(state.hand[color], length) if color != LOCOMOTIVE else 0
+        locomotives = length - colored
+        if locomotives > state.hand[LOCOMOTIVE]:
+            return None
+        return colored, locomotives
+
+    def can_claim(self, player, route_id, color):
+        """Avgör om en spelare kan ta en förbindelse med kort av en viss färg.
+
+        Args:
+            player (int): Spelarens nummer.
+            route_id (int): Förbindelsens id.
+            color (int): Färgen som betalas med, lok fyller ut det som saknas.
+
+        Returns:
+            bool: True om förbindelsen är ledig och spelaren har tåg och kort.
+        """
+        return self._payment(player, route_id, color) is not None
+
+    def legal_claims(self, player):
+        """Hämtar alla förbindelser en spelare kan ta och med vilken färg.
+
+        Args:
+            player (int): Spelarens nummer.
+
+        Returns:
+            List[Tuple[int, int]]: Par av (förbindelsens id, färg).
+        """
+        state = self.players[player]
+        colors = [color for color in range(LOCOMOTIVE + 1) if state.hand[color]]
+        claims = []
+        for route_id, owner in enumerate(self.route_owner):
+            if owner != -1 or self.routes[route_id][2] > state.trains:
+                continue
+            for color in colors:
+                if self._payment(player, route_id, color) is not None:
+                    claims.append((route_id, color))
+        return claims
+
+    def claim(self, player, route_id, color):
+        """Låter en spelare ta en förbindelse och uppdaterar poäng och biljetter.
+
+        Args:
+            player (int): Spelarens nummer.
+            route_id (int): Förbindelsens id.
+            color (int): Färgen som betalas med, lok fyller ut det som saknas.
+
+        Returns:
+            int: Poäng som förbindelsen och nyss klara biljetter gav.
+
+        Raises:
+            ValueError: Om förbindelsen är tagen eller spelaren saknar tåg eller kort.
+        """
+        payment = self._payment(player, route_id, color)
+        if payment is None:
+            raise ValueError(f"Spelare {player} kan inte ta förbindelse {route_id} med färg {color}")
+        colored, locomotives = payment
+        a_id, b_id, length = self.routes[route_id]
+
+        state = self.players[player]
+        if colored:
+            state.hand[color] -= colored
+            self.discard.extend([color] * colored)
+        if locomotives:
+            state.hand[LOCOMOTIVE] -= locomotives
+            self.discard.extend([LOCOMOTIVE] * locomotives)
+        state.trains -= length
+        state.routes.append(route_id)
+        self.route_owner[route_id] = player
+
+        points = ROUTE_POINTS.get(length, 0)
+        state.route_points += points
+        for other, paths in enumerate(self._paths):
+            if paths is not None:
+                self._path_changes[other].append((a_id, b_id, 0 if other == player else None))
+        return points + state.union(a_id, b_id)
+
+    def player_paths(self, player):
+        """Hämtar kortaste vägarna som de ser ut för en spelare.
+
+        Spelarens egna förbindelser kostar inget och de som andra har tagit är blockerade.
+        Förbindelser som dragits sedan förra frågan läggs in stegvis i stället för att allt räknas om.
+        Delas strukturen med en kopia kopieras den först, så att kopian behåller sina beräknade avstånd.
+
+        Args:
+            player (int): Spelarens nummer.
+
+        Returns:
+            DynamicShortestPaths: Kortaste vägarna för spelaren.
+        """
+        paths = self._paths[player]
+        if paths is None:
+            paths = DynamicShortestPaths(self.graph, self.validate_paths)
+            for route_id, owner in enumerate(self.route_owner):
+                if owner != -1:
+                    a_id, b_id, _ = self.routes[route_id]
+                    paths.set_route_weight(a_id, b_id, 0 if owner == player else None)
+            self._paths[player] = paths
+            self._path_changes[player].clear()
+        elif self._path_changes[player]:
+            if self._paths_shared[player]:
+                paths = paths.copy()
+                self._paths[player] = paths
+                self._paths_shared[player] = False
+            for a_id, b_id, weight in self._path_changes[player]:
+                paths.set_route_weight(a_id, b_id, weight)
+            self._path_changes[player].clear()
+        return paths
+
+    def route_between(self, a_id, b_id):
+        """Hittar förbindelsen mellan två städer.
+
+        Args:
+            a_id (int): Första stadens id.
+            b_id (int): Andra stadens id.
+
+        Returns:
+            int | None: Förbindelsens id, None om städerna inte är grannar.
+        """
+        return self.route_index.get((min(a_id, b_id), max(a_id, b_id)))
+
+    def add_ticket(self, player, start, end, points):
+        """Ger en spelare en biljett mellan två städer.
+
+        Args:
+            player (int): Spelarens nummer.
+            start (str): Startstadens namn.
+            end (str): Slutstadens namn.
+            points (int): Biljettens poäng.
+
+        Returns:
+            bool: True om biljetten redan är klar.
+        """
+        ids = self.graph.ids
+        return self.players[player].add_ticket(ids[start], ids[end], points)
+
+    def is_ticket_complete(self, player, start, end):
+        """Avgör om en spelare har förbundit två städer.
+
+        Args:
+            player (int): Spelarens nummer.
+            start (str): Startstadens namn.
+            end (str): Slutstadens namn.
+
+        Returns:
+            bool: True om städerna hänger ihop via spelarens förbindelser.
+        """
+        ids = self.graph.ids
+        return self.players[player].connected(ids[start], ids[end])
+
+    @property
+    def last_round(self):
+        """bool: True när någon spelare har så få tåg kvar att sista rundan har börjat."""
+        return any(state.trains <= LAST_ROUND_TRAINS for state in self.players)
+
+    def scores(self):
+        """Hämtar spelarnas poäng just nu.
+
+        Returns:
+            List[int]: Poängen per spelare.
+        """
+        return [state.score for state in self.players]
+
+    def longest_routes(self):
+        """Hämtar längden på varje spelares längsta sammanhängande tåg.
+
+        Returns:
+            List[int]: Längden i tåg per spelare.
+        """
+        return [self.longest_solver.longest(state.routes) for state in self.players]
+
+    def final_scores(self):
+        """Hämtar spelarnas poäng vid spelets slut, med avdrag för ofärdiga biljetter och bonus för längsta tåget.
+
+        Returns:
+            List[int]: Poängen per spelare.
+        """
+        longest = self.longest_routes()
+        best = max(longest, default=0)
+        return [state.final_score + (LONGEST_ROUTE_BONUS if best and length == best else 0)
+                for state, length in zip(self.players, longest)]
+
+    def copy(self):
+        """Kopierar hela tillståndet, t.ex. för att pröva drag i en sökning.
+
+        Kartan, förbindelserna och lösaren för längsta tåget delas eftersom de inte beror på ett enskilt parti.
+
+        Returns:
+            GameState: En oberoende kopia.
+        """
+        other = GameState.__new__(GameState)
+        other.graph = self.graph
+        other.routes = self.routes
+        other.route_index = self.route_index
+        other.longest_solver = self.longest_solver
+        other.route_owner = list(self.route_owner)
+        other.rng = random.Random()
+        other.rng.setstate(self.rng.getstate())
+        other.deck = list(self.deck)
+        other.discard = list(self.discard)
+        other.players = [state.copy() for state in self.players]
+        # Kortaste vägarna delas och kopieras först när någon av dem ska lägga in en dragen förbindelse
+        other.validate_paths = self.validate_paths
+        other._paths = list(self._paths)
+        self._paths_shared = [paths is not None for paths in self._paths]
+        other._paths_shared = list(self._paths_shared)
+        other._path_changes = [list(changes) for changes in self._path_changes]
+        return other
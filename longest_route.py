@@ -0,0 +1,247 @@
+"""Längsta sammanhängande tåget, för bonusen vid spelets slut.
+
+Den längsta vägen i en spelares förbindelser är en stig där ingen förbindelse används två
+gånger, men städer får passeras flera gånger. Det är NP-svårt i allmänhet, men spelarnas nät
+är små och glesa, så en uttömmande sökning med bra beskärning räcker:
+
+* Nätet delas upp i sammanhängande komponenter som löses var för sig.
+* Har en komponent högst två städer med udda grad finns en Eulerväg och svaret är hela komponenten.
+* Annars börjar en längsta stig alltid i en stad med udda grad, så bara de prövas som start.
+* Städer med grad två slås ihop med sina förbindelser, eftersom en stig som passerar dem måste
+  använda båda.
+* Hur långt en stig kan fortsätta beror bara på var den är och vilka förbindelser den har
+  använt, inte i vilken ordning, så varje sådant tillstånd beräknas bara en gång.
+
+Resultatet per komponent sparas med förbindelsernas bitmask som nyckel. När en spelare tar en ny
+förbindelse ändras bara komponenten den hamnar i, så de andra hämtas direkt ur cachen.
+"""
+import time
+
+# Antal komponenter som sparas innan cachen töms
+CACHE_SIZE = 65536
+
+
+class LongestRouteSolver:
+    def __init__(self, routes, cache_size=CACHE_SIZE):
+        """Skapar en lösare för en karta.
+
+        Args:
+            routes (List[Tuple[int, int, int]]): Kartans förbindelser som (stad, stad, längd), se game_state.claimable_routes.
+            cache_size (int): Antal komponenter som sparas.
+        """
+        self.routes = routes
+        self.cache_size = cache_size
+        self._cache = {}  # Bitmask över förbindelsernas id -> längsta stig i komponenten
+
+        self.calls = 0
+        self.components = 0
+        self.cache_hits = 0
+        self.euler_shortcuts = 0
+        self.nodes = 0  # Beräknade tillstånd i sökningen
+        self.memo_hits = 0  # Tillstånd som redan var beräknade
+        self.elapsed = 0.0
+
+    def longest(self, route_ids):
+        """Beräknar längsta sammanhängande stig bland några förbindelser.
+
+        Args:
+            route_ids (Iterable[int]): Id för spelarens förbindelser.
+
+        Returns:
+            int: Stigens längd i tåg, 0 om spelaren inte har några förbindelser.
+        """
+        start = time.perf_counter()
+        self.calls += 1
+        best = 0
+        for component in self._components(route_ids):
+            self.components += 1
+            mask = 0
+            total = 0
+            for route_id in component:
+                mask |= 1 << route_id
+                total += self.routes[route_id][2]
+            if total <= best:
+                # Inte ens hela komponenten kan slå det bästa hittills
+                continue
+
+            length = self._cache.get(mask)
+            if length is None:
+                length = self._solve(component, total)
+                if len(self._cache) >= self.cache_size:
+                    self._cache.clear()
+                self._cache[mask] = length
+            else:
+                self.cache_hits += 1
+            best = max(best, length)
+        self.elapsed += time.perf_counter() - start
+        return best
+
+    def _components(self, route_ids):
+        """Delar upp förbindelserna i sammanhängande komponenter.
+
+        Yields:
+            List[int]: Förbindelsernas id i en komponent.
+        """
+        parent = {}
+
+        def find(city):
+            while parent[city] != city:
+                parent[city] = parent[parent[city]]
+                city = parent[city]
+            return city
+
+        route_ids = list(route_ids)
+        for route_id in route_ids:
+            a, b, _ = self.routes[route_id]
+            parent.setdefault(a, a)
+            parent.setdefault(b, b)
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[root_b] = root_a
+
+        components = {}
+        for route_id in route_ids:
+            components.setdefault(find(self.routes[route_id][0]), []).append(route_id)
+        yield from components.values()
+
+    def _solve(self, component, total):
+        """Hittar längsta stigen i en sammanhängande komponent.
+
+        Args:
+            component (List[int]): Förbindelsernas id.
+            total (int): Summan av förbindelsernas längder.
+
+        Returns:
+            int: Stigens längd i tåg.
+        """
+        edges = {edge: self.routes[route_id] for edge, route_id in enumerate(component)}
+        incident = {}
+        for edge, (a, b, _) in edges.items():
+            incident.setdefault(a, set()).add(edge)
+            incident.setdefault(b, set()).add(edge)
+
+        odd = [city for city, city_edges in incident.items() if len(city_edges) % 2]
+        if len(odd) <= 2:
+            self.euler_shortcuts += 1
+            return total
+
+        adjacency = _series_reduce(edges, incident)
+
+        # Hur långt stigen kan fortsätta beror bara på staden och vilka förbindelser som är använda,
+        # så olika ordningar som använder samma förbindelser räknas bara en gång
+        memo = {}
+        nodes = 0
+        hits = 0
+
+        def extend(vertex, used):
+            nonlocal nodes, hits
+            key = (vertex, used)
+            length = memo.get(key)
+            if length is not None:
+                hits += 1
+                return length
+            nodes += 1
+            length = 0
+            for neighbor, bit, edge_length in adjacency[vertex]:
+                if not used & bit:
+                    length = max(length, edge_length + extend(neighbor, used | bit))
+            memo[key] = length
+            return length
+
+        best = 0
+        for vertex in odd:
+            best = max(best, extend(vertex, 0))
+            if best == total:
+                break
+
+        self.nodes += nodes
+        self.memo_hits += hits
+        return best
+
+    def stats(self):
+        """Hämtar statistik för sökningarna.
+
+        Returns:
+            dict: Antal anrop, komponenter, cacheträffar, Eulergenvägar, beräknade tillstånd,
+            återanvända tillstånd och medeltid per anrop i mikrosekunder.
+        """
+        return {
+            "calls": self.calls,
+            "components": self.components,
+            "cache_hits": self.cache_hits,
+            "euler_shortcuts": self.euler_shortcuts,
+            "nodes": self.nodes,
+            "memo_hits": self.memo_hits,
+            "cached": len(self._cache),
+            "mean_us": self.elapsed / self.calls * 1e6 if self.calls else 0.0,
+        }
+
+
+def _series_reduce(edges, incident):
+    """Slår ihop förbindelserna genom städer med grad två till en längre förbindelse.
+
+    En längsta stig börjar och slutar i städer med udda grad, så den som passerar en stad med
+    grad två måste använda båda förbindelserna. Städernas grad i övrigt ändras inte.
+
+    Args:
+        edges (dict): Förbindelse -> (stad, stad, längd). Ändras.
+        incident (dict): Stad -> förbindelserna som rör staden. Ändras.
+
+    Returns:
+        dict: Stad -> lista med (granne, bit för förbindelsen, längd) i den reducerade grafen.
+    """
+    next_edge = len(edges)
+    for city in list(incident):
+        city_edges = incident[city]
+        if len(city_edges) != 2:
+            continue
+        first, second = city_edges
+        a1, b1, length1 = edges[first]
+        a2, b2, length2 = edges[second]
+        if a1 == b1 or a2 == b2:
+            continue
+        x = b1 if a1 == city else a1
+        y = b2 if a2 == city else a2
+        del edges[first], edges[second], incident[city]
+        incident[x].discard(first)
+        incident[y].discard(second)
+        edges[next_edge] = (x, y, length1 + length2)
+        incident[x].add(next_edge)
+        incident[y].add(next_edge)
+        next_edge += 1
+
+    adjacency = {city: [] for city in incident}
+    for bit_index, (a, b, length) in enumerate(edges.values()):
+        bit = 1 << bit_index
+        adjacency[a].append((b, bit, length))
+        if a != b:
+            adjacency[b].append((a, bit, length))
+    return adjacency
+
+
+def longest_trail_brute_force(routes, route_ids):
+    """Beräknar längsta stigen genom att pröva alla startstäder utan beskärning, för kontroll.
+
+    Args:
+        routes (List[Tuple[int, int, int]]): Kartans förbindelser.
+        route_ids (Iterable[int]): Id för spelarens förbindelser.
+
+    Returns:
+        int: Stigens längd i tåg.
+    """
+    adjacency = {}
+    for route_id in route_ids:
+        a, b, length = routes[route_id]
+        adjacency.setdefault(a, []).append((b, route_id, length))
+        adjacency.setdefault(b, []).append((a, route_id, length))
+
+    def search(vertex, used):
+        best = 0
+        for neighbor, route_id, length in adjacency[vertex]:
+            if route_id not in used:
+                used.add(route_id)
+                best = max(best, length + search(neighbor, used))
+                used.discard(route_id)
+        return best
+
+    return max((search(vertex, set()) for vertex in adjacency), default=0)
@@ -0,0 +1,227 @@
+"""Kompilerade kartfiler som minnesmappas vid start.
+
+Källformatet (JSON eller TOML, se core.load_map_source) kompileras till en binär fil med
+städernas namn, koordinater och CSR-kanterna. Filen minnesmappas och grafen läser direkt ur
+bufferten, så även stora kartor laddas nästan direkt och delas mellan processer utan kopiering.
+
+Exempel:
+    python mapfile.py compile maps/europe.json maps/europe.ttrmap
+    python mapfile.py compile maps/europe.json --verify
+    python mapfile.py info maps/europe.ttrmap
+"""
+import argparse
+import mmap
+import struct
+import sys
+import time
+from array import array
+
+import core
+
+MAGIC = b"TTRM"
+VERSION = 1
+# magic, version, reserverat, antal städer, antal kanter, A*-skala, bredd, höjd, längd på namnen i byte
+HEADER = struct.Struct("<4sHHIIdIII")
+ALIGNMENT = 8
+
+COMPILED_EXTENSION = ".ttrmap"
+
+
+def _aligned(offset):
+    """Avrundar en position uppåt till närmaste ALIGNMENT."""
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _layout(num_cities, num_edges, names_length):
+    """Beräknar var varje del av filen börjar.
+
+    Filen består av filhuvudet följt av offsets, targets, distances, weights, xs och ys som
+    32-bitars heltal och sist städernas namn som UTF-8 åtskilda av radbrytningar.
+
+    Returns:
+        Tuple[dict, int]: Startposition och antal element per del, samt filens storlek.
+    """
+    sections = {}
+    position = _aligned(HEADER.size)
+    for name, count in (("offsets", num_cities + 1), ("targets", num_edges), ("distances", num_edges),
+                        ("weights", num_edges), ("xs", num_cities), ("ys", num_cities)):
+        sections[name] = (position, count)
+        position = _aligned(position + 4 * count)
+    sections["names"] = (position, names_length)
+    return sections, position + names_length
+
+
+def write_compiled(graph_local, path, width=0, height=0):
+    """Skriver en graf som kompilerad kartfil.
+
+    Koordinaterna avrundas till heltal. A*-skalan kalibreras om på de avrundade koordinaterna,
+    eftersom skalan från originalkoordinaterna kan överskatta avstånden efter avrundningen.
+
+    Args:
+        graph_local (CompactGraph): Grafen.
+        path (str): Sökvägen till filen.
+        width (int): Kartans bredd i pixlar.
+        height (int): Kartans höjd i pixlar.
+    """
+    num_cities = len(graph_local)
+    num_edges = len(graph_local.targets)
+    names = "\n".join(graph_local.names).encode("utf-8")
+    sections, size = _layout(num_cities, num_edges, len(names))
+
+    arrays = {name: array("i", (round(value) for value in getattr(graph_local, name)))
+              for name in ("offsets", "targets", "distances", "weights", "xs", "ys")}
+    heuristic_scale = graph_local.heuristic_scale()
+    if heuristic_scale:
+        heuristic_scale = core.CompactGraph.from_arrays(graph_local.names, **arrays).heuristic_scale()
+
+    data = bytearray(size)
+    HEADER.pack_into(data, 0, MAGIC, VERSION, 0, num_cities, num_edges, heuristic_scale,
+                     width, height, len(names))
+    for name, values in arrays.items():
+        if sys.byteorder != "little":
+            values.byteswap()
+        start, _ = sections[name]
+        data[start:start + 4 * len(values)] = values.tobytes()
+    start, _ = sections["names"]
+    data[start:] = names
+
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+def verify_compiled(source_graph, compiled_graph):
+    """Kontrollerar att A* på den kompilerade kartan ger samma kostnad som Dijkstra på källkartan för alla par.
+
+    Args:
+        source_graph (CompactGraph): Kartan som kompilerades.
+        compiled_graph (CompactGraph): Den inlästa kompilerade kartan.
+
+    Raises:
+        RuntimeError: Om någon kostnad skiljer sig.
+    """
+    names = source_graph.names
+    for start in names:
+        for end in names:
+            expected = core.a_star(start, end, source_graph, use_heuristic=False)
+            actual = core.a_star(start, end, compiled_graph)
+            expected_cost = None if expected is None else expected[0]
+            actual_cost = None if actual is None else actual[0]
+            if expected_cost != actual_cost:
+                raise RuntimeError(f"Fel kostnad från {start} till {end}: {actual_cost}, källkartan ger {expected_cost}")
+
+
+def compile_map(source_path, output_path=None, verify=False):
+    """Kompilerar en karta i källformatet till en binär kartfil.
+
+    Args:
+        source_path (str): Kartan i JSON- eller TOML-format.
+        output_path (str | None): Den kompilerade filen, som standard källfilen med ändelsen .ttrmap.
+        verify (bool): Om True läses filen in igen och kontrolleras med `verify_compiled`.
+
+    Returns:
+        str: Sökvägen till den kompilerade filen.
+
+    Raises:
+        RuntimeError: Om kontrollen är på och den kompilerade kartan ger andra kostnader.
+    """
+    if output_path is None:
+        output_path = source_path.rsplit(".", 1)[0] + COMPILED_EXTENSION
+    source = core.load_map_source(source_path)
+    graph_local = core.CompactGraph()
+    for city in source["cities"]:
+        graph_local.add_city(city["name"], tuple(city["coords"]), [tuple(link) for link in city["links"]])
+    graph_local.build()
+    write_compiled(graph_local, output_path, source.get("width", 0), source.get("height", 0))
+    if verify:
+        verify_compiled(graph_local, load_compiled(output_path))
+    return output_path
+
+
+def graph_from_buffer(buffer):
+    """Skapar en graf som läser direkt ur en kompilerad kartfil i minnet.
+
+    Args:
+        buffer: En buffert med filens innehåll, t.ex. ett mmap-objekt eller bytes.
+
+    Returns:
+        CompactGraph: Grafen.
+    """
+    view = memoryview(buffer)
+    magic, version, _, num_cities, num_edges, heuristic_scale, _, _, names_length = HEADER.unpack_from(view)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Filen är inte en kompilerad karta i version %d" % VERSION)
+
+    sections, size = _layout(num_cities, num_edges, names_length)
+    if len(view) < size:
+        raise ValueError("Den kompilerade kartan är avkortad")
+
+    arrays = {}
+    for name in ("offsets", "targets", "distances", "weights", "xs", "ys"):
+        start, count = sections[name]
+        if sys.byteorder == "little":
+            # Ingen kopiering, grafen läser direkt ur bufferten
+            arrays[name] = view[start:start + 4 * count].cast("i")
+        else:
+            values = array("i", view[start:start + 4 * count].tobytes())
+            values.byteswap()
+            arrays[name] = values
+
+    start, _ = sections["names"]
+    names = str(view[start:start + names_length], "utf-8").split("\n") if num_cities else []
+
+    return core.CompactGraph.from_arrays(names, heuristic_scale=heuristic_scale, buffer=buffer, **arrays)
+
+
+def load_compiled(path):
+    """Minnesmappar en kompilerad kartfil och skapar en graf över den.
+
+    Args:
+        path (str): Sökvägen till filen.
+
+    Returns:
+        CompactGraph: Grafen. Mappningen hålls öppen så länge grafen finns.
+    """
+    with open(path, "rb") as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return graph_from_buffer(buffer)
+
+
+def load_map(path):
+    """Läser en karta, kompilerad eller i källformatet beroende på filändelsen.
+
+    Args:
+        path (str): Sökvägen till kartfilen.
+
+    Returns:
+        CompactGraph: Grafen.
+    """
+    if path.endswith(COMPILED_EXTENSION):
+        return load_compiled(path)
+    return core.load_graph(path, core.CompactGraph()).build()
+
+
+def main(argv=None):
+    """Kommandoradsgränssnittet för kartfilerna."""
+    parser = argparse.ArgumentParser(description="Kompilerar och undersöker kartfiler.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    compile_parser = commands.add_parser("compile", help="kompilerar en karta i JSON- eller TOML-format")
+    compile_parser.add_argument("source")
+    compile_parser.add_argument("output", nargs="?")
+    compile_parser.add_argument("--verify", action="store_true",
+                                help="kontrollerar att alla par får samma kostnad som i källkartan")
+    info_parser = commands.add_parser("info", help="visar storlek och laddningstid för en karta")
+    info_parser.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "compile":
+        print(compile_map(args.source, args.output, args.verify))
+        return
+
+    start = time.perf_counter()
+    graph_local = load_map(args.path)
+    elapsed = time.perf_counter() - start
+    print(f"{len(graph_local)} städer, {len(graph_local.targets)} kanter, laddad på {elapsed * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""Slumpade stora kartor för att mäta hur vägsökning och biljettgenerering skalar.
+
+Exempel:
+    python mapgen.py --bench --sizes 100 1000 10000 100000
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import time
+
+import core
+
+# Avståndet mellan städerna i pixlar och hur många pixlar ett tåg motsvarar
+CITY_SPACING = 40
+PIXELS_PER_TRAIN = 16
+
+# Andel av rutorna i rutnätet som får en diagonal förbindelse
+DIAGONAL_SHARE = 0.5
+
+
+# =================
+# Generering
+
+def generate_map(num_cities, seed=0):
+    """Genererar en nästan plan karta med städer på ett skakat rutnät.
+
+    Varje stad är förbunden med sina grannar till höger och nedåt, och vissa rutor får en av
+    sina två diagonaler, så kartan hänger alltid ihop och kanterna korsar nästan aldrig
+    varandra. Avstånden i tåg beräknas från pixelavstånden, som på den riktiga kartan.
+
+    Args:
+        num_cities (int): Antal städer.
+        seed (int): Fröet för slumpgeneratorn.
+
+    Yields:
+        Tuple[str, Tuple[int, int], List[Tuple[str, int, int]]]: Argumenten till Graph.add_city för varje stad.
+    """
+    rng = random.Random(seed)
+    columns = max(1, math.ceil(math.sqrt(num_cities)))
+
+    # Skakar varje punkt högst en tredjedel av avståndet så att ordningen i rutnätet behålls
+    jitter = CITY_SPACING / 3
+    coords = [
+        (round((i % columns + 0.5) * CITY_SPACING + rng.uniform(-jitter, jitter)),
+         round((i // columns + 0.5) * CITY_SPACING + rng.uniform(-jitter, jitter)))
+        for i in range(num_cities)
+    ]
+
+    links = [[] for _ in range(num_cities)]
+
+    def connect(a, b):
+        distance = max(1, round(math.dist(coords[a], coords[b]) / PIXELS_PER_TRAIN))
+        links[a].append((f"c{b}", distance, 0))
+        links[b].append((f"c{a}", distance, 0))
+
+    for i in range(num_cities):
+        column = i % columns
+        right = i + 1
+        down = i + columns
+        if column + 1 < columns and right < num_cities:
+            connect(i, right)
+        if down < num_cities:
+            connect(i, down)
+        if rng.random() < DIAGONAL_SHARE and column + 1 < columns and down + 1 < num_cities:
+            # En av rutans två diagonaler, så att de inte korsar varandra
+            if rng.random() < 0.5:
+                connect(i, down + 1)
+            else:
+                connect(right, down)
+
+    for i in range(num_cities):
+        yield f"c{i}", coords[i], links[i]
+
+
+def write_map_source(num_cities, seed, file):
+    """Skriver en slumpad karta i källformatet (JSON), en stad per rad.
+
+    Args:
+        num_cities (int): Antal städer.
+        seed (int): Fröet för slumpgeneratorn.
+        file (TextIO): Filen att skriva till.
+    """
+    width, height = map_size(num_cities)
+    file.write(f'{{\n  "name": "synthetic-{num_cities}-{seed}",\n  "width": {width},\n  "height": {height},\n'
+               f'  "cities": [\n')
+    for i, (name, coords, links) in enumerate(generate_map(num_cities, seed)):
+        separator = ",\n" if i else ""
+        file.write(separator + "    " + json.dumps({"name": name, "coords": coords, "links": links},
+                                                   separators=(", ", ": ")))
+    file.write("\n  ]\n}\n")
+
+
+def map_size(num_cities):
+    """Beräknar kartans storlek i pixlar.
+
+    Args:
+        num_cities (int): Antal städer.
+
+    Returns:
+        Tuple[int, int]: Bredd och höjd.
+    """
+    columns = max(1, math.ceil(math.sqrt(num_cities)))
+    rows = math.ceil(num_cities / columns)
+    return columns * CITY_SPACING, rows * CITY_SPACING
+
+
+def build_graph(num_cities, seed=0, compact=True):
+    """Bygger en slumpad karta.
+
+    Args:
+        num_cities (int): Antal städer.
+        seed (int): Fröet för slumpgeneratorn.
+        compact (bool): Om True byggs en CompactGraph, annars en Graph.
+
+    Returns:
+        CompactGraph | Graph: Kartan.
+    """
+    graph_local = core.CompactGraph() if compact else core.Graph()
+    for name, coords, links in generate_map(num_cities, seed):
+        graph_local.add_city(name, coords, links)
+    if compact:
+        graph_local.build()
+    return graph_local
+
+
+# =================
+# Mätningar
+
+# Största karta där hela kortaste-vägen-tabellen byggs, den växer kvadratiskt
+PATH_TABLE_LIMIT = 2000
+
+
+def _time_per_op(function, ops):
+    """Mäter tiden per operation i mikrosekunder."""
+    start = time.perf_counter()
+    function()
+    return (time.perf_counter() - start) / ops * 1e6
+
+
+def bench_size(num_cities, seed=0, queries=200):
+    """Mäter vägsökning och biljettgenerering på en slumpad karta.
+
+    Args:
+        num_cities (int): Antal städer.
+        seed (int): Fröet för kartan och dragningarna.
+        queries (int): Antal sökningar och biljetter per mätning.
+
+    Returns:
+        dict: Tid för att bygga kartan och tid per operation i mikrosekunder.
+    """
+    start = time.perf_counter()
+    graph_local = build_graph(num_cities, seed)
+    build_s = time.perf_counter() - start
+
+    rng = random.Random(seed)
+    names = graph_local.names
+    pairs = [(rng.choice(names), rng.choice(names)) for _ in range(queries)]
+
+    expansions = {"a_star": 0, "dijkstra": 0}
+
+    def searches(use_heuristic, key):
+        for a, b in pairs:
+            expansions[key] += core.a_star(a, b, graph_local, use_heuristic, return_expansions=True)[2]
+
+    result = {
+        "cities": len(graph_local),
+        "edges": len(graph_local.targets),
+        "build_s": build_s,
+        "a_star_us": _time_per_op(lambda: searches(True, "a_star"), queries),
+        "dijkstra_us": _time_per_op(lambda: searches(False, "dijkstra"), queries),
+    }
+    result["a_star_expansions"] = expansions["a_star"] / queries
+    result["dijkstra_expansions"] = expansions["dijkstra"] / queries
+
+    start = time.perf_counter()
+    sampler = core.RouteSampler(graph_local)
+    result["sampler_build_s"] = time.perf_counter() - start
+    sample_rng = random.Random(seed)
+    result["route_planner_us"] = _time_per_op(lambda: [sampler.sample(9, sample_rng) for _ in range(queries)],
+                                              queries)
+    result["route_failure_rate"] = sampler.stats()["failure_rate"]
+
+    start = time.perf_counter()
+    index = core.LSHIndex(graph_local, core.even_hyperplanes(4, *map_size(num_cities)))
+    result["lsh_build_s"] = time.perf_counter() - start
+    lsh_rng = random.Random(seed)
+    result["lsh_us"] = _time_per_op(lambda: [index.sample_pair(lsh_rng) for _ in range(queries)], queries)
+
+    if num_cities <= PATH_TABLE_LIMIT:
+        start = time.perf_counter()
+        graph_local.path_table = core.ShortestPathTable.build(graph_local)
+        result["path_table_build_s"] = time.perf_counter() - start
+        result["path_table_us"] = _time_per_op(lambda: [core.a_star(a, b, graph_local) for a, b in pairs], queries)
+    return result
+
+
+def scaling_exponent(results, key):
+    """Uppskattar hur en mätning växer med antal städer, som lutningen i en log-log-anpassning.
+
+    Args:
+        results (List[dict]): Resultaten från bench_size, ett per storlek.
+        key (str): Mätningen.
+
+    Returns:
+        float | None: Exponenten k i tid ~ städer^k, None om det finns för få punkter.
+    """
+    points = [(math.log(r["cities"]), math.log(r[key])) for r in results if r.get(key, 0) > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+
+def main(argv=None):
+    """Kommandoradsgränssnittet för kartgeneratorn."""
+    parser = argparse.ArgumentParser(description="Genererar slumpade kartor och mäter hur algoritmerna skalar.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000], help="antal städer")
+    parser.add_argument("--seed", type=int, default=0, help="frö för slumpgeneratorn")
+    parser.add_argument("--queries", type=int, default=200, help="antal sökningar och biljetter per storlek")
+    parser.add_argument("--bench", action="store_true", help="mäter i stället för att skriva ut kartan")
+    parser.add_argument("--output", help="skriver kartan eller mätresultatet som JSON till filen")
+    args = parser.parse_args(argv)
+
+    if not args.bench:
+        # Skriver kartan i källformatet, se core.load_map_source
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as file:
+                write_map_source(args.sizes[0], args.seed, file)
+        else:
+            write_map_source(args.sizes[0], args.seed, sys.stdout)
+        return
+
+    results = []
+    for size in args.sizes:
+        result = bench_size(size, args.seed, args.queries)
+        results.append(result)
+        print(f"{result['cities']:>8} städer  bygg {result['build_s']:7.3f} s  "
+              f"a_star {result['a_star_us']:10.1f} µs ({result['a_star_expansions']:.0f} exp)  "
+              f"dijkstra {result['dijkstra_us']:10.1f} µs ({result['dijkstra_expansions']:.0f} exp)  "
+              f"route_planner {result['route_planner_us']:8.1f} µs  lsh {result['lsh_us']:6.2f} µs")
+
+    keys = ("build_s", "a_star_us", "dijkstra_us", "route_planner_us", "lsh_us")
+    exponents = {key: scaling_exponent(results, key) for key in keys}
+    print("exponent (tid ~ städer^k): " + ", ".join(
+        f"{key} {value:.2f}" for key, value in exponents.items() if value is not None))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"seed": args.seed, "queries": args.queries, "results": results, "exponents": exponents},
+                      file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""Tidtagning av spel-loopen och biljettgenereringen, med rullande histogram och export till CSV/JSON.
+
+Avstängd kostar en tidtagare bara ett attributuppslag och en tom kontexthanterare, och de
+instrumenterade funktionerna (t.ex. core.a_star) är då de ursprungliga funktionerna utan omslag.
+Omslagen sätts på när profileringen slås på och tas bort när den slås av.
+
+Exempel:
+    with profiler.timer("events"):
+        ...
+    profiler.instrument(core, "a_star", "a_star")
+    profiler.enable()
+"""
+import csv
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Antal senaste mätningar per tidtagare som percentiler och histogram beräknas på
+ROLLING_WINDOW = 512
+
+# Övre gränser i millisekunder för staplarna i histogrammet över tid per bild
+FRAME_BUCKETS_MS = (1, 2, 4, 8, 16, 33, 50, 100, float("inf"))
+
+# Hur ofta resultatet skrivs till fil när export är påslagen, i sekunder
+EXPORT_INTERVAL = 5.0
+
+
+class _NullTimer:
+    """Tidtagaren som används när profileringen är avstängd."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler_local, name):
+        self.profiler = profiler_local
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Profiler:
+    def __init__(self, window=ROLLING_WINDOW):
+        """Skapar en avstängd profilerare.
+
+        Args:
+            window (int): Antal senaste mätningar per tidtagare som percentilerna beräknas på.
+        """
+        self.enabled = False
+        self.window = window
+        self._lock = threading.Lock()  # Biljetterna genereras i en bakgrundstråd
+        self._timers = {}  # namn -> [antal, total tid, största tid, senaste tiderna]
+        self._frames = deque(maxlen=window)
+        self._instrumented = []  # (ägare, attribut, namn, ursprunglig funktion, fanns i ägarens __dict__)
+
+        self.export_path = None
+        self.export_interval = EXPORT_INTERVAL
+        self._last_export = 0.0
+
+    # =================
+    # Av och på
+
+    def enable(self):
+        """Slår på profileringen och sätter omslag på de instrumenterade funktionerna."""
+        if self.enabled:
+            return
+        self.enabled = True
+        for index, (owner, attribute, name, _, _) in enumerate(self._instrumented):
+            original = getattr(owner, attribute)
+            self._instrumented[index] = (owner, attribute, name, original, attribute in vars(owner))
+            setattr(owner, attribute, self._wrap(original, name))
+
+    def disable(self):
+        """Slår av profileringen och återställer de instrumenterade funktionerna."""
+        if not self.enabled:
+            return
+        self.enabled = False
+        for owner, attribute, _, original, own_attribute in self._instrumented:
+            if own_attribute:
+                setattr(owner, attribute, original)
+            else:
+                # Ett omslag på en instans tas bort så att klassens metod syns igen
+                delattr(owner, attribute)
+
+    def toggle(self):
+        """Växlar mellan på och av.
+
+        Returns:
+            bool: True om profileringen är påslagen efteråt.
+        """
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+        return self.enabled
+
+    def instrument(self, owner, attribute, name=None):
+        """Tar tid på en funktion eller metod när profileringen är påslagen.
+
+        Funktionen byts ut på ägaren, så anrop som `core.a_star(...)` mäts men inte funktioner
+        som redan har importerats med `from core import a_star`. En funktion som redan är
+        instrumenterad hoppas över, annars skulle den få två omslag och mätas två gånger.
+
+        Args:
+            owner: Modulen, klassen eller instansen som har funktionen.
+            attribute (str): Funktionens namn hos ägaren.
+            name (str | None): Tidtagarens namn, som standard `attribute`.
+        """
+        if any(other is owner and other_attribute == attribute
+               for other, other_attribute, _, _, _ in self._instrumented):
+            return
+        name = name or attribute
+        self._instrumented.append((owner, attribute, name, None, False))
+        if self.enabled:
+            index = len(self._instrumented) - 1
+            original = getattr(owner, attribute)
+            self._instrumented[index] = (owner, attribute, name, original, attribute in vars(owner))
+            setattr(owner, attribute, self._wrap(original, name))
+
+    def _wrap(self, function, name):
+        """Skapar ett omslag som tar tid på varje anrop."""
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start)
+        return timed
+
+    # =================
+    # Mätning
+
+    def timer(self, name):
+        """Tar tid på ett block med `with`.
+
+        Args:
+            name (str): Tidtagarens namn.
+
+        Returns:
+            Kontexthanteraren, en tom sådan när profileringen är avstängd.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def record(self, name, seconds):
+        """Lägger till en mätning.
+
+        Args:
+            name (str): Tidtagarens namn.
+            seconds (float): Tiden i sekunder.
+        """
+        with self._lock:
+            stats = self._timers.get(name)
+            if stats is None:
+                stats = self._timers[name] = [0, 0.0, 0.0, deque(maxlen=self.window)]
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+            stats[3].append(seconds)
+
+    def frame(self, seconds):
+        """Lägger till tiden för en ritad bild.
+
+        Args:
+            seconds (float): Tiden från händelserna till att bilden var ritad, i sekunder.
+        """
+        if self.enabled:
+            with self._lock:
+                self._frames.append(seconds)
+
+    def reset(self):
+        """Tömmer alla mätningar."""
+        with self._lock:
+            self._timers.clear()
+            self._frames.clear()
+
+    # =================
+    # Resultat
+
+    def timers(self):
+        """Sammanfattar tidtagarna.
+
+        Returns:
+            dict: Per tidtagare antal, total tid, medeltid, p50, p95 och största tid i millisekunder.
+            Percentilerna gäller de senaste mätningarna.
+        """
+        with self._lock:
+            items = [(name, count, total, longest, sorted(recent))
+                     for name, (count, total, longest, recent) in self._timers.items()]
+        return {
+            name: {
+                "count": count,
+                "total_ms": total * 1000,
+                "mean_ms": total / count * 1000,
+                "p50_ms": percentile(recent, 50) * 1000,
+                "p95_ms": percentile(recent, 95) * 1000,
+                "max_ms": longest * 1000,
+            }
+            for name, count, total, longest, recent in sorted(items)
+        }
+
+    def frame_histogram(self):
+        """Histogram över tiden för de senaste bilderna.
+
+        Returns:
+            List[Tuple[float, int]]: Övre gräns i millisekunder och antal bilder per stapel.
+        """
+        with self._lock:
+            frames = list(self._frames)
+        counts = [0] * len(FRAME_BUCKETS_MS)
+        for seconds in frames:
+            milliseconds = seconds * 1000
+            for index, upper in enumerate(FRAME_BUCKETS_MS):
+                if milliseconds <= upper:
+                    counts[index] += 1
+                    break
+        return list(zip(FRAME_BUCKETS_MS, counts))
+
+    def summary(self):
+        """Hämtar allt som exporteras.
+
+        Returns:
+            dict: Tidpunkt, tidtagarna, de senaste bildernas percentiler och histogrammet.
+        """
+        with self._lock:
+            frames = sorted(self._frames)
+        return {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "timers": self.timers(),
+            "frames": {
+                "count": len(frames),
+                "p50_ms": percentile(frames, 50) * 1000,
+                "p95_ms": percentile(frames, 95) * 1000,
+                "max_ms": frames[-1] * 1000 if frames else 0.0,
+                "histogram": [{"upper_ms": None if upper == float("inf") else upper, "count": count}
+                              for upper, count in self.frame_histogram()],
+            },
+        }
+
+    def export(self, path):
+        """Skriver resultatet till en fil, som CSV eller JSON beroende på filändelsen.
+
+        Filen skrivs först under ett tillfälligt namn och byts sedan ut, så den är aldrig halvskriven.
+
+        Args:
+            path (str): Sökvägen, .csv för CSV och annars JSON.
+        """
+        summary = self.summary()
+        temporary = path + ".tmp"
+        with open(temporary, "w", encoding="utf-8", newline="") as file:
+            if path.endswith(".csv"):
+                writer = csv.writer(file)
+                writer.writerow(["name", "count", "total_ms", "mean_ms", "p50_ms", "p95_ms", "max_ms"])
+                for name, stats in summary["timers"].items():
+                    writer.writerow([name, stats["count"], f"{stats['total_ms']:.4f}", f"{stats['mean_ms']:.4f}",
+                                     f"{stats['p50_ms']:.4f}", f"{stats['p95_ms']:.4f}", f"{stats['max_ms']:.4f}"])
+                frames = summary["frames"]
+                writer.writerow(["frame", frames["count"], "", "", f"{frames['p50_ms']:.4f}",
+                                 f"{frames['p95_ms']:.4f}", f"{frames['max_ms']:.4f}"])
+            else:
+                json.dump(summary, file, indent=2)
+        os.replace(temporary, path)
+
+    def configure_export(self, path, interval=EXPORT_INTERVAL):
+        """Slår på regelbunden export, se `maybe_export`.
+
+        Args:
+            path (str | None): Filen att skriva till, None för att slå av exporten.
+            interval (float): Sekunder mellan exporterna.
+        """
+        self.export_path = path
+        self.export_interval = interval
+
+    def maybe_export(self):
+        """Exporterar om exporten är påslagen och det har gått tillräckligt lång tid sedan förra gången.
+
+        Returns:
+            bool: True om resultatet skrevs.
+        """
+        if not self.enabled or self.export_path is None:
+            return False
+        now = time.monotonic()
+        if now - self._last_export < self.export_interval:
+            return False
+        self._last_export = now
+        self.export(self.export_path)
+        return True
+
+
+def percentile(sorted_values, p):
+    """Percentil ur en sorterad lista med närmaste rang. Används även av selfplay.py.
+
+    Args:
+        sorted_values (List[float]): Värdena i stigande ordning.
+        p (float): Percentilen, 0 till 100.
+
+    Returns:
+        float: Värdet, 0.0 om listan är tom.
+    """
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, -(-p * len(sorted_values) // 100) - 1))]
+
+
+# Gemensam profilerare för spelet
+profiler = Profiler()
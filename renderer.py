@@ -0,0 +1,143 @@
+import time
+
+import pygame
+
+
+class Renderer:
+    def __init__(self, screen, background_color, layers):
+        """Ritar spelet med ett cachat statiskt lager och ett cachat överlägg för rutterna.
+
+        Skärmen ritas bara om när något har ändrats, och då bara inom de smutsiga rektanglarna.
+
+        Args:
+            screen (pygame.Surface): Fönstrets yta.
+            background_color: Färgen som fyller skärmen under bilderna.
+            layers (List[Tuple[pygame.Surface, Tuple[int, int]]]): Bilderna i det statiska lagret och deras positioner.
+        """
+        self.screen = screen
+        self.size = screen.get_size()
+
+        # Det statiska lagret (bakgrundsfärg, karta och kort) ritas en gång
+        self.static = pygame.Surface(self.size).convert()
+        self.static.fill(background_color)
+        for surface, position in layers:
+            self.static.blit(surface, position)
+
+        # Överlägget med rutterna ritas bara om när rutterna byts
+        self.overlay = pygame.Surface(self.size, pygame.SRCALPHA).convert_alpha()
+        self.overlay.fill((0, 0, 0, 0))
+        self._overlay_rect = pygame.Rect(0, 0, 0, 0)
+
+        # Markeringen under muspekaren och profileringens överlägg ritas ovanpå och rensas bara där de låg
+        self._small_layers = {}  # namn -> [yta, området som används]
+        for name in ("highlight", "hud"):
+            surface = pygame.Surface(self.size, pygame.SRCALPHA).convert_alpha()
+            surface.fill((0, 0, 0, 0))
+            self._small_layers[name] = [surface, pygame.Rect(0, 0, 0, 0)]
+
+        self._dirty = [self.screen.get_rect()]
+
+        # Statistik för att mäta kostnaden per ritad bild
+        self.frames = 0
+        self.total_frame_time = 0.0
+        self.last_frame_time = 0.0
+
+    @property
+    def dirty(self):
+        """bool: Om något behöver ritas om."""
+        return bool(self._dirty)
+
+    def invalidate(self, rect=None):
+        """Markerar en del av skärmen, eller hela skärmen, som smutsig.
+
+        Args:
+            rect (pygame.Rect | None): Området som ska ritas om, None för hela skärmen.
+        """
+        self._dirty.append(pygame.Rect(rect) if rect is not None else self.screen.get_rect())
+
+    def set_overlay(self, draw_function):
+        """Ritar om ruttöverlägget och markerar det ändrade området som smutsigt.
+
+        Args:
+            draw_function (Callable[[pygame.Surface], None]): Funktion som ritar rutterna på en genomskinlig yta.
+        """
+        self.overlay.fill((0, 0, 0, 0))
+        draw_function(self.overlay)
+        new_rect = self.overlay.get_bounding_rect()
+
+        # Både det gamla och det nya överlägget ska ritas om
+        if self._overlay_rect.width and new_rect.width:
+            self._dirty.append(self._overlay_rect.union(new_rect))
+        elif self._overlay_rect.width or new_rect.width:
+            self._dirty.append(self._overlay_rect if self._overlay_rect.width else new_rect)
+        self._overlay_rect = new_rect
+
+    def set_highlight(self, draw_function=None):
+        """Byter markeringen, t.ex. staden eller förbindelsen under muspekaren.
+
+        Till skillnad från `set_overlay` rensas bara området där den gamla markeringen låg och
+        inget behöver sökas igenom, så markeringen kan bytas vid varje musrörelse.
+
+        Args:
+            draw_function (Callable[[pygame.Surface], pygame.Rect | None] | None): Funktion som ritar
+                markeringen och returnerar området den ritade i, None för att ta bort markeringen.
+        """
+        self._set_small_layer("highlight", draw_function)
+
+    def set_hud(self, draw_function=None):
+        """Byter överlägget med profileringens mätningar, som ritas överst. Se `set_highlight`.
+
+        Args:
+            draw_function (Callable[[pygame.Surface], pygame.Rect | None] | None): Funktion som ritar
+                överlägget och returnerar området den ritade i, None för att ta bort överlägget.
+        """
+        self._set_small_layer("hud", draw_function)
+
+    def _set_small_layer(self, name, draw_function):
+        """Rensar ett litet lager där det låg och ritar det på nytt."""
+        layer = self._small_layers[name]
+        surface, old_rect = layer
+        if old_rect.width:
+            surface.fill((0, 0, 0, 0), old_rect)
+            self._dirty.append(old_rect)
+        new_rect = draw_function(surface) if draw_function is not None else None
+        layer[1] = pygame.Rect(new_rect) if new_rect else pygame.Rect(0, 0, 0, 0)
+        if layer[1].width:
+            self._dirty.append(layer[1])
+
+    def render(self):
+        """Ritar om de smutsiga rektanglarna och uppdaterar bara dem på skärmen.
+
+        Returns:
+            List[pygame.Rect]: Rektanglarna som ritades om, tom om inget hade ändrats.
+        """
+        if not self._dirty:
+            return []
+
+        start = time.perf_counter()
+        rects = self._dirty
+        self._dirty = []
+        for rect in rects:
+            self.screen.blit(self.static, rect, rect)
+            self.screen.blit(self.overlay, rect, rect)
+            for surface, layer_rect in self._small_layers.values():
+                if layer_rect.colliderect(rect):
+                    self.screen.blit(surface, rect, rect)
+        pygame.display.update(rects)
+
+        self.last_frame_time = time.perf_counter() - start
+        self.total_frame_time += self.last_frame_time
+        self.frames += 1
+        return rects
+
+    def stats(self):
+        """Hämtar statistik över de ritade bilderna.
+
+        Returns:
+            dict: Antal ritade bilder samt senaste och genomsnittliga tid per bild i millisekunder.
+        """
+        return {
+            "frames": self.frames,
+            "last_frame_ms": self.last_frame_time * 1000,
+            "mean_frame_ms": self.total_frame_time * 1000 / self.frames if self.frames else 0.0,
+        }
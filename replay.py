@@ -0,0 +1,532 @@
+"""Binär logg över en spelsession som kan spelas upp igen utan fönster.
+
+Loggen innehåller fröet, varje uppsättning biljetter som visades, klick på de två korten och
+tagna förbindelser. Den skrivs bara till i slutet, via en buffert som töms efter varje
+ögonblicksbild och minst en gång per sekund, så en krasch tappar högst den sista sekunden. Med jämna mellanrum skrivs en
+ögonblicksbild av hela tillståndet, så att en uppspelning kan hoppa till vilken händelse som helst
+genom att binärsöka efter närmaste ögonblicksbild och bara spela upp händelserna efter den.
+När loggen stängs skrivs en tabell över ögonblicksbilderna och en avslutande post som pekar på den,
+så att en uppspelning inte behöver läsa igenom hela filen för att hitta dem.
+
+Exempel:
+    python main.py --record session.ttrr
+    python replay.py info session.ttrr
+    python replay.py seek session.ttrr 1200
+    python replay.py play session.ttrr --speed 20
+"""
+import argparse
+import bisect
+import mmap
+import os
+import struct
+import time
+
+import core
+
+MAGIC = b"TTRR"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQ8s")  # magic, version, reserverat, frö, början av kartans SHA-256
+RECORD = struct.Struct("<BII")  # typ, millisekunder sedan sessionens början, längd på innehållet
+
+EVENT_TICKETS = 1
+EVENT_CLICK = 2
+EVENT_CLAIM = 3
+EVENT_SNAPSHOT = 4
+EVENT_INDEX = 5  # Tabellen över ögonblicksbilderna, skrivs när loggen stängs
+EVENT_FOOTER = 6  # Sista posten, pekar på tabellen
+
+INDEX_HEADER = struct.Struct("<II")  # antal händelser, antal ögonblicksbilder
+INDEX_ENTRY = struct.Struct("<IQ")  # antal händelser före ögonblicksbilden, postens position
+FOOTER = struct.Struct("<Q4s")  # tabellens position, magic
+FOOTER_MAGIC = b"TTRI"
+
+KINDS = ("short", "long")  # Biljettsorterna och de två korten, i den ordning de kodas
+NO_POINTS = 0xFFFF  # Långa rutter har ingen poäng
+
+MAX_SEED = 2 ** 64  # Fröet lagras som ett 64-bitars heltal utan tecken
+
+SNAPSHOT_INTERVAL = 256  # Antal händelser mellan ögonblicksbilderna
+BUFFER_SIZE = 64 * 1024
+FLUSH_INTERVAL = 1.0  # Högsta antal sekunder som en händelse ligger kvar i bufferten
+
+
+def _map_digest(graph_local):
+    """Början av kartans hash, så att en logg inte spelas upp mot fel karta."""
+    return bytes.fromhex(graph_local.digest())[:8]
+
+
+# =================
+# Tillstånd
+
+class ReplayState:
+    def __init__(self, seed):
+        """Det spelarna såg vid en viss punkt i sessionen.
+
+        Args:
+            seed (int): Sessionens frö.
+        """
+        self.seed = seed
+        self.event_index = 0  # Antal händelser som har spelats upp
+        self.time_ms = 0
+        self.clicks = dict.fromkeys(KINDS, 0)
+        self.kind = None  # Sorten på biljetterna som visas
+        self.tickets = []  # Biljetterna som visas: {"route", "shortest_path", "points"}
+        self.owners = {}  # förbindelsens id -> (spelare, färg)
+
+    def apply(self, event_type, time_ms, data):
+        """Spelar upp en händelse.
+
+        Args:
+            event_type (int): Händelsens typ.
+            time_ms (int): Tiden för händelsen.
+            data: Händelsens innehåll, se `decode_event`.
+        """
+        if event_type == EVENT_TICKETS:
+            self.kind, self.tickets = data
+        elif event_type == EVENT_CLICK:
+            self.clicks[data] += 1
+        elif event_type == EVENT_CLAIM:
+            player, route_id, color = data
+            self.owners[route_id] = (player, color)
+        self.event_index += 1
+        self.time_ms = time_ms
+
+    def list_routes(self):
+        """Bygger rutterna som de ser ut i main.list_routes.
+
+        Returns:
+            List[dict]: Rutterna med städer, koordinater och poäng.
+        """
+        routes = []
+        for ticket in self.tickets:
+            route = {
+                "route": ticket["route"],
+                "route_coords": core.travel_coords(ticket["route"]),
+                "shortest_path": ticket["shortest_path"],
+                "shortest_route_coords": core.travel_coords(ticket["shortest_path"]),
+            }
+            if ticket["points"] is not None:
+                route["points"] = ticket["points"]
+            routes.append(route)
+        return routes
+
+    def summary(self):
+        """Sammanfattar tillståndet som vanlig data.
+
+        Returns:
+            dict: Händelse, tid, klick, biljetterna som visas och antal tagna förbindelser.
+        """
+        return {
+            "event_index": self.event_index,
+            "time_ms": self.time_ms,
+            "clicks": dict(self.clicks),
+            "kind": self.kind,
+            "tickets": [(ticket["route"][0], ticket["route"][-1], ticket["points"]) for ticket in self.tickets],
+            "claims": len(self.owners),
+        }
+
+
+# =================
+# Kodning
+
+def _encode_tickets(kind, routes, ids):
+    """Kodar en uppsättning biljetter: sort, antal och för varje biljett poäng och städernas id."""
+    parts = [struct.pack("<BB", KINDS.index(kind), len(routes))]
+    for route in routes:
+        cities = [ids[name] for name in route["route"]]
+        path = [ids[name] for name in route.get("shortest_path", route["route"])]
+        points = route.get("points")
+        parts.append(struct.pack(f"<HBB{len(cities) + len(path)}H", NO_POINTS if points is None else points,
+                                 len(cities), len(path), *cities, *path))
+    return b"".join(parts)
+
+
+def _decode_tickets(payload, offset, names):
+    """Avkodar en uppsättning biljetter.
+
+    Returns:
+        Tuple[Tuple[str, List[dict]], int]: Sorten och biljetterna, samt positionen efter dem.
+    """
+    kind, count = struct.unpack_from("<BB", payload, offset)
+    offset += 2
+    tickets = []
+    for _ in range(count):
+        points, route_len, path_len = struct.unpack_from("<HBB", payload, offset)
+        offset += 4
+        cities = struct.unpack_from(f"<{route_len + path_len}H", payload, offset)
+        offset += 2 * (route_len + path_len)
+        tickets.append({
+            "route": [names[city] for city in cities[:route_len]],
+            "shortest_path": [names[city] for city in cities[route_len:]],
+            "points": None if points == NO_POINTS else points,
+        })
+    return (KINDS[kind], tickets), offset
+
+
+def _encode_snapshot(state, ids):
+    """Kodar hela tillståndet."""
+    parts = [struct.pack("<I", state.event_index), struct.pack(f"<{len(KINDS)}I", *state.clicks.values())]
+    if state.kind is None:
+        parts.append(struct.pack("<B", 0))
+    else:
+        parts.append(struct.pack("<B", 1))
+        parts.append(_encode_tickets(state.kind, state.tickets, ids))
+    parts.append(struct.pack("<I", len(state.owners)))
+    for route_id, (player, color) in state.owners.items():
+        parts.append(struct.pack("<IBB", route_id, player, color))
+    return b"".join(parts)
+
+
+def _decode_snapshot(payload, seed, time_ms, names):
+    """Avkodar en ögonblicksbild till ett tillstånd."""
+    state = ReplayState(seed)
+    state.time_ms = time_ms
+    (state.event_index,) = struct.unpack_from("<I", payload, 0)
+    offset = 4
+    state.clicks = dict(zip(KINDS, struct.unpack_from(f"<{len(KINDS)}I", payload, offset)))
+    offset += 4 * len(KINDS)
+    (has_tickets,) = struct.unpack_from("<B", payload, offset)
+    offset += 1
+    if has_tickets:
+        (state.kind, state.tickets), offset = _decode_tickets(payload, offset, names)
+    (num_owners,) = struct.unpack_from("<I", payload, offset)
+    offset += 4
+    for _ in range(num_owners):
+        route_id, player, color = struct.unpack_from("<IBB", payload, offset)
+        offset += 6
+        state.owners[route_id] = (player, color)
+    return state
+
+
+def decode_event(event_type, payload, names):
+    """Avkodar innehållet i en händelse.
+
+    Args:
+        event_type (int): Händelsens typ.
+        payload (bytes): Innehållet.
+        names (List[str]): Städernas namn i id-ordning.
+
+    Returns:
+        (sort, biljetter) för biljetter, sorten för klick och (spelare, förbindelse, färg) för tagna förbindelser.
+    """
+    if event_type == EVENT_TICKETS:
+        return _decode_tickets(payload, 0, names)[0]
+    if event_type == EVENT_CLICK:
+        return KINDS[payload[0]]
+    if event_type == EVENT_CLAIM:
+        return struct.unpack("<BIB", payload)
+    raise ValueError(f"Okänd händelse: {event_type}")
+
+
+# =================
+# Skrivning
+
+class ReplayWriter:
+    def __init__(self, path, seed, graph_local=None, snapshot_interval=SNAPSHOT_INTERVAL):
+        """Skapar en ny logg.
+
+        Args:
+            path (str): Sökvägen till loggen.
+            seed (int): Sessionens frö.
+            graph_local (CompactGraph | None): Kartan, som standard core.compact_graph.
+            snapshot_interval (int): Antal händelser mellan ögonblicksbilderna.
+
+        Raises:
+            ValueError: Om fröet inte ryms i loggen, se MAX_SEED.
+        """
+        if not 0 <= seed < MAX_SEED:
+            raise ValueError(f"Fröet måste vara mellan 0 och {MAX_SEED - 1}: {seed}")
+        self.graph = graph_local or core.compact_graph
+        self.ids = self.graph.ids
+        self.snapshot_interval = snapshot_interval
+        self.state = ReplayState(seed)
+        self._start = time.monotonic()
+        self._last_flush = self._start
+        self._snapshots = []  # (antal händelser, position) för varje ögonblicksbild, till tabellen i close
+        self._file = open(path, "wb", buffering=BUFFER_SIZE)
+        self._file.write(HEADER.pack(MAGIC, VERSION, 0, seed, _map_digest(self.graph)))
+        self._position = HEADER.size
+
+    def _record(self, event_type, time_ms, payload):
+        """Skriver en post och returnerar dess position."""
+        position = self._position
+        self._file.write(RECORD.pack(event_type, time_ms, len(payload)))
+        self._file.write(payload)
+        self._position += RECORD.size + len(payload)
+        return position
+
+    def _write(self, event_type, payload, data):
+        """Skriver en händelse, spelar upp den i det egna tillståndet och skriver ibland en ögonblicksbild."""
+        now = time.monotonic()
+        time_ms = int((now - self._start) * 1000)
+        self._record(event_type, time_ms, payload)
+        self.state.apply(event_type, time_ms, data)
+        if self.state.event_index % self.snapshot_interval == 0:
+            position = self._record(EVENT_SNAPSHOT, time_ms, _encode_snapshot(self.state, self.ids))
+            self._snapshots.append((self.state.event_index, position))
+            self.flush()
+        elif now - self._last_flush >= FLUSH_INTERVAL:
+            self.flush()
+
+    def tickets(self, kind, routes):
+        """Loggar en uppsättning biljetter som visas.
+
+        Args:
+            kind (str): "short" eller "long".
+            routes (List[dict]): Rutterna, som i main.list_routes.
+        """
+        payload = _encode_tickets(kind, routes, self.ids)
+        self._write(EVENT_TICKETS, payload, _decode_tickets(payload, 0, self.graph.names)[0])
+
+    def click(self, kind):
+        """Loggar ett klick på ett av korten.
+
+        Args:
+            kind (str): "short" för det vanliga kortet, "long" för det blå.
+        """
+        self._write(EVENT_CLICK, struct.pack("<B", KINDS.index(kind)), kind)
+
+    def claim(self, player, route_id, color):
+        """Loggar en tagen förbindelse.
+
+        Args:
+            player (int): Spelarens nummer.
+            route_id (int): Förbindelsens id, se game_state.claimable_routes.
+            color (int): Färgen som betalades med.
+        """
+        self._write(EVENT_CLAIM, struct.pack("<BIB", player, route_id, color), (player, route_id, color))
+
+    def flush(self):
+        """Tömmer bufferten till filen."""
+        self._file.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """Skriver tabellen över ögonblicksbilderna och den avslutande posten och stänger loggen."""
+        time_ms = int((time.monotonic() - self._start) * 1000)
+        table = [INDEX_HEADER.pack(self.state.event_index, len(self._snapshots))]
+        table.extend(INDEX_ENTRY.pack(event_index, position) for event_index, position in self._snapshots)
+        position = self._record(EVENT_INDEX, time_ms, b"".join(table))
+        self._record(EVENT_FOOTER, time_ms, FOOTER.pack(position, FOOTER_MAGIC))
+        self._file.close()
+
+
+# =================
+# Uppspelning
+
+class Replay:
+    def __init__(self, path, graph_local=None):
+        """Öppnar en logg och läser tabellen över ögonblicksbilderna.
+
+        Filen minnesmappas och tabellen hittas via den sista posten, så öppningen läser inte
+        händelserna. Saknas tabellen, t.ex. efter en krasch, letas ögonblicksbilderna upp genom att
+        läsa posternas huvuden. En avkortad sista post hoppas då över.
+
+        Args:
+            path (str): Sökvägen till loggen.
+            graph_local (CompactGraph | None): Kartan, som standard core.compact_graph.
+
+        Raises:
+            ValueError: Om filen inte är en logg i rätt version eller gjordes med en annan karta.
+        """
+        graph_local = graph_local or core.compact_graph
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size < HEADER.size:
+                raise ValueError("Filen är inte en logg i version %d" % VERSION)
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.seed, digest = HEADER.unpack_from(self._data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Filen är inte en logg i version %d" % VERSION)
+        if digest != _map_digest(graph_local):
+            raise ValueError("Loggen gjordes med en annan karta")
+        self.names = graph_local.names
+
+        self._snapshots = []  # Antal händelser före varje ögonblicksbild, i stigande ordning
+        self._snapshot_offsets = []
+        if not self._read_index():
+            self._scan()
+
+    def _read_index(self):
+        """Läser tabellen över ögonblicksbilderna via den sista posten.
+
+        Returns:
+            bool: False om loggen inte stängdes ordentligt och tabellen saknas.
+        """
+        footer = len(self._data) - RECORD.size - FOOTER.size
+        if footer < HEADER.size:
+            return False
+        event_type, _, length = RECORD.unpack_from(self._data, footer)
+        position, magic = FOOTER.unpack_from(self._data, footer + RECORD.size)
+        if event_type != EVENT_FOOTER or length != FOOTER.size or magic != FOOTER_MAGIC:
+            return False
+        if not HEADER.size <= position <= footer - RECORD.size - INDEX_HEADER.size:
+            return False
+        event_type, _, length = RECORD.unpack_from(self._data, position)
+        start = position + RECORD.size
+        if event_type != EVENT_INDEX or start + length != footer:
+            return False
+
+        self._count, num_snapshots = INDEX_HEADER.unpack_from(self._data, start)
+        if INDEX_HEADER.size + num_snapshots * INDEX_ENTRY.size != length:
+            return False
+        for entry in INDEX_ENTRY.iter_unpack(self._data[start + INDEX_HEADER.size:footer]):
+            self._snapshots.append(entry[0])
+            self._snapshot_offsets.append(entry[1])
+        self._end = position
+        return True
+
+    def _scan(self):
+        """Letar upp ögonblicksbilderna genom att läsa posternas huvuden från början."""
+        self._count = 0
+        position = HEADER.size
+        while position + RECORD.size <= len(self._data):
+            event_type, _, length = RECORD.unpack_from(self._data, position)
+            if position + RECORD.size + length > len(self._data):
+                break
+            if event_type == EVENT_SNAPSHOT:
+                self._snapshots.append(self._count)
+                self._snapshot_offsets.append(position)
+            elif event_type not in (EVENT_INDEX, EVENT_FOOTER):
+                self._count += 1
+            position += RECORD.size + length
+        self._end = position
+
+    def close(self):
+        """Stänger minnesmappningen."""
+        self._data.close()
+
+    def __len__(self):
+        """Antal händelser i loggen."""
+        return self._count
+
+    def _events(self, index):
+        """Läser händelserna i ordning från och med en händelse.
+
+        Närmaste ögonblicksbild före händelsen hittas med binärsökning och posterna efter den läses,
+        så högst SNAPSHOT_INTERVAL händelser hoppas över.
+
+        Yields:
+            Tuple[int, int, object]: Typ, tid i millisekunder och innehållet, se `decode_event`.
+        """
+        snapshot = bisect.bisect_right(self._snapshots, index) - 1
+        if snapshot < 0:
+            event_index, position = 0, HEADER.size
+        else:
+            event_index, position = self._snapshots[snapshot], self._snapshot_offsets[snapshot]
+        while position < self._end:
+            event_type, time_ms, length = RECORD.unpack_from(self._data, position)
+            start = position + RECORD.size
+            position = start + length
+            if event_type in (EVENT_SNAPSHOT, EVENT_INDEX, EVENT_FOOTER):
+                continue
+            if event_index >= index:
+                yield event_type, time_ms, decode_event(event_type, self._data[start:position], self.names)
+            event_index += 1
+
+    def event(self, index):
+        """Läser en händelse.
+
+        Args:
+            index (int): Händelsens nummer.
+
+        Returns:
+            Tuple[int, int, object]: Typ, tid i millisekunder och innehållet, se `decode_event`.
+
+        Raises:
+            IndexError: Om loggen inte har så många händelser.
+        """
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("Händelsen finns inte i loggen")
+        return next(self._events(index))
+
+    def state_at(self, index):
+        """Hämtar tillståndet efter de första `index` händelserna.
+
+        Närmaste ögonblicksbild hittas med binärsökning, så högst SNAPSHOT_INTERVAL händelser spelas upp.
+
+        Args:
+            index (int): Antal händelser, 0 för början av sessionen.
+
+        Returns:
+            ReplayState: Tillståndet.
+        """
+        index = max(0, min(index, self._count))
+        snapshot = bisect.bisect_right(self._snapshots, index) - 1
+        if snapshot < 0:
+            state = ReplayState(self.seed)
+        else:
+            position = self._snapshot_offsets[snapshot]
+            _, time_ms, length = RECORD.unpack_from(self._data, position)
+            start = position + RECORD.size
+            state = _decode_snapshot(self._data[start:start + length], self.seed, time_ms, self.names)
+        events = self._events(state.event_index)
+        for _ in range(state.event_index, index):
+            state.apply(*next(events))
+        return state
+
+    def play(self, start=0, speed=None, callback=None):
+        """Spelar upp loggen från en händelse utan fönster.
+
+        Args:
+            start (int): Händelsen att börja från, begränsas till loggens längd som i `state_at`.
+            speed (float | None): Hur många gånger snabbare än verkligheten, None för så fort som möjligt.
+            callback (Callable[[ReplayState, int, object], None] | None): Anropas efter varje händelse med
+                tillståndet, händelsens typ och innehåll.
+
+        Returns:
+            ReplayState: Tillståndet i slutet.
+        """
+        start = max(0, min(start, self._count))
+        state = self.state_at(start)
+        wall_start = time.monotonic()
+        session_start = state.time_ms
+        for event_type, time_ms, data in self._events(start):
+            if speed:
+                delay = (time_ms - session_start) / 1000 / speed - (time.monotonic() - wall_start)
+                if delay > 0:
+                    time.sleep(delay)
+            state.apply(event_type, time_ms, data)
+            if callback is not None:
+                callback(state, event_type, data)
+        return state
+
+
+def main(argv=None):
+    """Kommandoradsgränssnittet för loggarna."""
+    parser = argparse.ArgumentParser(description="Spelar upp loggar från spelsessioner.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    info_parser = commands.add_parser("info", help="visar fröet, antal händelser och ögonblicksbilder")
+    info_parser.add_argument("path")
+    seek_parser = commands.add_parser("seek", help="visar tillståndet efter ett antal händelser")
+    seek_parser.add_argument("path")
+    seek_parser.add_argument("index", type=int)
+    play_parser = commands.add_parser("play", help="spelar upp loggen och skriver ut varje händelse")
+    play_parser.add_argument("path")
+    play_parser.add_argument("--start", type=int, default=0, help="händelsen att börja från")
+    play_parser.add_argument("--speed", type=float, help="gånger snabbare än verkligheten (standard så fort som möjligt)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    replay = Replay(args.path)
+    opened = time.perf_counter() - start
+
+    if args.command == "info":
+        end = replay.state_at(len(replay))
+        print(f"frö {replay.seed}, {len(replay)} händelser, {len(replay._snapshots)} ögonblicksbilder, "
+              f"{end.time_ms / 1000:.1f} s, öppnad på {opened * 1000:.2f} ms")
+        print(end.summary())
+    elif args.command == "seek":
+        start = time.perf_counter()
+        state = replay.state_at(args.index)
+        print(f"{(time.perf_counter() - start) * 1000:.3f} ms")
+        print(state.summary())
+    else:
+        def show(state, event_type, data):
+            print(f"{state.event_index:>8} {state.time_ms / 1000:9.3f} s  {state.summary()}")
+        replay.play(args.start, args.speed, show)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,641 @@
+"""Hela partier mellan datorspelare, för att balansera biljetterna från route_creater och long_route.
+
+Exempel:
+    python selfplay.py --games 1000 --seed 1 --workers 8 --policies greedy random
+    python selfplay.py --games 200 --seed 1 --policies mcts greedy --json selfplay.json
+"""
+import argparse
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import core
+from game_state import LOCOMOTIVE, LONGEST_ROUTE_BONUS, GameState
+from profiler import percentile
+from tickets import init_worker
+
+# Biljetter per spelare i början av partiet
+SHORT_TICKETS = 3
+LONG_TICKETS = 1
+SHORT_TICKET_TRAINS = 9
+KINDS = ("short", "long")
+
+# Antal kort en spelare drar när den inte tar en förbindelse
+DRAW_CARDS = 2
+
+# Säkerhetsgräns för partier där ingen kommer vidare
+MAX_TURNS = 1000
+
+# Antal partier per arbetsuppgift, fast av samma skäl som tickets.CHUNK_SIZE
+GAMES_PER_CHUNK = 4
+
+MCTS_ITERATIONS = 100
+MCTS_ROLLOUT_DEPTH = 12
+MCTS_EXPLORATION = 1.4
+MCTS_EXPAND_VISITS = 8  # Besök innan en nod under roten får sitt första barn
+MCTS_LONGEST_CANDIDATES = 3  # De längsta förbindelserna som prövas när alla biljetter är klara
+MCTS_REWARD_SCALE = 10  # Ledning i poäng som ger belöningen 0,73
+
+LATENCY_PERCENTILES = (50, 90, 99)
+
+POLICIES = {}
+
+
+def policy(name):
+    """Registrerar en datorspelare under ett namn.
+
+    Args:
+        name (str): Namnet som används på kommandoraden och i rapporten.
+    """
+    def register(cls):
+        cls.name = name
+        POLICIES[name] = cls
+        return cls
+    return register
+
+
+def play_move(state, player, move):
+    """Utför ett drag.
+
+    Args:
+        state (GameState): Partiet.
+        player (int): Spelarens nummer.
+        move (Tuple[int, int] | None): (förbindelsens id, färg) för att ta en förbindelse, None för att dra kort.
+
+    Returns:
+        bool: False om spelaren inte kunde göra något, dvs. korten är slut.
+    """
+    if move is not None:
+        state.claim(player, *move)
+        return True
+    drawn = [state.draw_card(player) for _ in range(DRAW_CARDS)]
+    return any(card is not None for card in drawn)
+
+
+def best_color_claims(state, player):
+    """Hämtar ett drag per förbindelse som spelaren kan ta, med den färg som sparar flest lok.
+
+    Returns:
+        List[Tuple[int, int]]: Par av (förbindelsens id, färg).
+    """
+    hand = state.players[player].hand
+    claims = {}
+    for route_id, color in state.legal_claims(player):
+        key = (color != LOCOMOTIVE, hand[color])
+        if route_id not in claims or key > claims[route_id][0]:
+            claims[route_id] = (key, color)
+    return [(route_id, color) for route_id, (_, color) in claims.items()]
+
+
+def claim_color(state, player, route_id):
+    """Hittar den färg som sparar flest lok när en spelare tar en förbindelse.
+
+    Returns:
+        int | None: Färgen, None om spelaren inte kan ta förbindelsen.
+    """
+    if state.route_owner[route_id] != -1:
+        return None
+    hand = state.players[player].hand
+    # Färgen med flest kort behöver minst lok, räcker den inte räcker ingen annan färg heller
+    color = max(range(LOCOMOTIVE), key=hand.__getitem__)
+    if not hand[color]:
+        color = LOCOMOTIVE
+    return color if state.can_claim(player, route_id, color) else None
+
+
+# =================
+# Datorspelare
+
+@policy("random")
+class RandomPolicy:
+    def choose(self, state, player, rng):
+        """Väljer ett av alla tillåtna drag, att dra kort inräknat, med lika sannolikhet.
+
+        Args:
+            state (GameState): Partiet.
+            player (int): Spelarens nummer.
+            rng (random.Random): Slumpgeneratorn som används.
+
+        Returns:
+            Tuple[int, int] | None: Draget, se play_move.
+        """
+        moves = best_color_claims(state, player)
+        choice = rng.randrange(len(moves) + 1)
+        return moves[choice] if choice < len(moves) else None
+
+
+@policy("greedy")
+class GreedyPolicy:
+    def choose(self, state, player, rng):
+        """Tar förbindelser längs kortaste vägen för de biljetter som inte är klara.
+
+        Vägarna går runt förbindelser som andra har tagit och räknar spelarens egna som gratis.
+        Finns inga biljetter kvar tas den längsta förbindelsen för poängen.
+
+        Args:
+            state (GameState): Partiet.
+            player (int): Spelarens nummer.
+            rng (random.Random): Används inte, finns för att alla spelare ska ha samma gränssnitt.
+
+        Returns:
+            Tuple[int, int] | None: Draget, se play_move.
+        """
+        claims = best_color_claims(state, player)
+        needed = self._needed_routes(state, player)
+        options = [claim for claim in claims if claim[0] in needed] if needed else claims
+        if not options:
+            return None
+        return max(options, key=lambda claim: state.routes[claim[0]][2])
+
+    @staticmethod
+    def _needed_routes(state, player):
+        """Hämtar förbindelserna spelaren saknar på kortaste vägen för varje ofärdig biljett.
+
+        Vägarna tar hänsyn till vilka förbindelser som redan är tagna, se GameState.player_paths.
+        """
+        needed = set()
+        paths = state.player_paths(player)
+        for (start, end, _), completed in zip(state.players[player].tickets, state.players[player].completed):
+            if completed:
+                continue
+            path = paths.path(start, end)
+            if path is None:
+                continue
+            for a_id, b_id in zip(path, path[1:]):
+                route_id = state.route_between(a_id, b_id)
+                if state.route_owner[route_id] == -1:
+                    needed.add(route_id)
+        return needed
+
+
+class _MctsNode:
+    """En nod i sökträdet för MctsPolicy."""
+    __slots__ = ("move", "children", "untried", "visits", "reward")
+
+    def __init__(self, move=None):
+        self.move = move  # Förbindelsens id, None för att dra kort
+        self.children = []
+        self.untried = None  # Dragen som inte har fått en egen nod än, hämtas första gången noden nås
+        self.visits = 0
+        self.reward = 0.0
+
+
+@policy("mcts")
+class MctsPolicy:
+    def __init__(self, iterations=MCTS_ITERATIONS, rollout_depth=MCTS_ROLLOUT_DEPTH, exploration=MCTS_EXPLORATION):
+        """Monte Carlo-trädsökning över spelarens egna drag, med UCB1 i varje nod.
+
+        Varje iteration blandar om de dolda korten i en kopia av partiet och går ner i trädet med
+        UCB1. Motspelarna finns inte i trädet utan svarar mellan spelarens drag som GreedyPolicy, så
+        att deras svar varierar mellan iterationerna. Eftersom kortleken blandas om hör en nod till
+        dragen dit och inte till en viss ställning, och drag som spelaren inte har kort till just då
+        hoppas över. Ett nytt drag får en egen nod och resten av de `rollout_depth` dragen spelas som
+        i GreedyPolicy. Under roten växer en nod först när den har besökts MCTS_EXPAND_VISITS gånger.
+
+        Vägarna planeras en gång per drag och planeras om i kopian när någon annan tar en förbindelse
+        på dem. Ställningen efteråt värderas med `_estimate`, så att en biljett som blir klar först
+        efter simuleringen ändå ger poäng för det som redan är byggt.
+
+        Args:
+            iterations (int): Antal simuleringar per drag.
+            rollout_depth (int): Antal drag i varje simulering, dragen i trädet inräknade.
+            exploration (float): Konstanten i UCB1.
+        """
+        self.iterations = iterations
+        self.rollout_depth = rollout_depth
+        self.exploration = exploration
+
+    def choose(self, state, player, rng):
+        """Väljer det drag som simulerats flest gånger.
+
+        Bara förbindelser på vägen för biljetterna och att dra kort prövas. Är alla biljetter klara
+        prövas de längsta förbindelserna i stället.
+
+        Args:
+            state (GameState): Partiet.
+            player (int): Spelarens nummer.
+            rng (random.Random): Slumpgeneratorn som används.
+
+        Returns:
+            Tuple[int, int] | None: Draget, se play_move.
+        """
+        plans = [self._plan(state, p) for p in range(len(state.players))]
+        by_length = sorted(range(len(state.routes)), key=lambda route_id: -state.routes[route_id][2])
+        root = _MctsNode()
+        root.untried = self._moves(state, player, plans, by_length)
+        if len(root.untried) == 1:
+            return None
+
+        for _ in range(self.iterations):
+            self._iterate(root, state, player, plans, by_length, rng)
+        best = max(root.children, key=lambda child: child.visits)
+        return None if best.move is None else (best.move, claim_color(state, player, best.move))
+
+    def _iterate(self, root, state, player, plans, by_length, rng):
+        """Går ner i trädet, lägger till en nod, spelar klart simuleringen och för tillbaka belöningen."""
+        sim = state.copy()
+        # Spelaren vet inte i vilken ordning korten ligger, så kopians kortlek blandas om
+        sim.rng.seed(rng.getrandbits(32))
+        sim.rng.shuffle(sim.deck)
+        plans = list(plans)
+
+        node = root
+        visited = []
+        plies = 0
+        current = player
+        # Dragen i roten prövas alltid, även i sista rundan
+        while plies < self.rollout_depth and (not plies or not sim.last_round):
+            # Under roten får en nod sitt k:te barn först efter MCTS_EXPAND_VISITS * k^2 besök,
+            # innan dess spelas resten av simuleringen från noden
+            widen = node is root or MCTS_EXPAND_VISITS * (len(node.children) + 1) ** 2 <= node.visits
+            if not widen and not node.children:
+                break
+            if node.untried is None:
+                node.untried = self._moves(sim, player, plans, by_length)
+            colors = {}
+            for move in node.untried + [child.move for child in node.children]:
+                colors[move] = None if move is None else claim_color(sim, player, move)
+            untried = [move for move in node.untried if move is None or colors[move] is not None]
+            children = [child for child in node.children if child.move is None or colors[child.move] is not None]
+            expanded = bool(untried and widen)
+            if expanded:
+                preferred = self._rollout_move(sim, player, plans, by_length, rng)
+                move = None if preferred is None else preferred[0]
+                if move not in untried:
+                    move = rng.choice(untried)
+                node.untried.remove(move)
+                child = _MctsNode(move)
+                node.children.append(child)
+            elif children:
+                log_visits = math.log(node.visits)
+                child = max(children, key=lambda child: child.reward / child.visits
+                            + self.exploration * math.sqrt(log_visits / child.visits))
+            else:
+                break
+            play_move(sim, player, None if child.move is None else (child.move, colors[child.move]))
+            visited.append(child)
+            node = child
+            plies += 1
+
+            # Motspelarna ingår inte i trädet utan svarar som i simuleringen, olika för varje iteration
+            current = (player + 1) % len(sim.players)
+            while current != player and plies < self.rollout_depth and not sim.last_round:
+                play_move(sim, current, self._rollout_move(sim, current, plans, by_length, rng))
+                current = (current + 1) % len(sim.players)
+                plies += 1
+            if expanded:
+                break
+
+        for _ in range(plies, self.rollout_depth):
+            if sim.last_round:
+                break
+            play_move(sim, current, self._rollout_move(sim, current, plans, by_length, rng))
+            current = (current + 1) % len(sim.players)
+
+        scores = self._estimate(sim, plans)
+        lead = scores[player] - max(score for other, score in enumerate(scores) if other != player)
+        reward = 1 / (1 + math.exp(-lead / MCTS_REWARD_SCALE))
+        root.visits += 1
+        for node in visited:
+            node.visits += 1
+            node.reward += reward
+
+    def _moves(self, sim, player, plans, by_length):
+        """Hämtar dragen som prövas i en nod: förbindelserna på biljetternas vägar och att dra kort.
+
+        Finns inga lediga förbindelser på vägarna prövas de längsta förbindelserna spelaren kan ta.
+
+        Returns:
+            List[int | None]: Förbindelsernas id, None för att dra kort.
+        """
+        targets = []
+        if not all(sim.players[player].completed):
+            self._refresh(sim, player, plans)
+            targets = self._targets(sim, plans[player])
+        if targets:
+            moves = [route_id for route_id in dict.fromkeys(targets) if claim_color(sim, player, route_id) is not None]
+        else:
+            moves = []
+            for route_id in by_length:
+                if len(moves) == MCTS_LONGEST_CANDIDATES:
+                    break
+                if claim_color(sim, player, route_id) is not None:
+                    moves.append(route_id)
+        moves.append(None)
+        return moves
+
+    @staticmethod
+    def _plan(state, player):
+        """Planerar en väg för varje ofärdig biljett, se GameState.player_paths.
+
+        Returns:
+            Dict[int, List[int] | None]: Biljettens index -> förbindelserna på vägen, None om vägen är avskuren.
+        """
+        paths = state.player_paths(player)
+        plan = {}
+        for index, ((start, end, _), completed) in enumerate(zip(state.players[player].tickets,
+                                                                 state.players[player].completed)):
+            if completed:
+                continue
+            path = paths.path(start, end)
+            plan[index] = None if path is None else [state.route_between(a_id, b_id)
+                                                     for a_id, b_id in zip(path, path[1:])]
+        return plan
+
+    @staticmethod
+    def _refresh(sim, player, plans):
+        """Planerar om en spelares vägar i kopian om någon annan har tagit en förbindelse på dem."""
+        owner = sim.route_owner
+        for route_ids in plans[player].values():
+            if route_ids is not None and any(owner[route_id] not in (-1, player) for route_id in route_ids):
+                plans[player] = MctsPolicy._plan(sim, player)
+                return
+
+    @staticmethod
+    def _targets(state, plan):
+        """Hämtar de lediga förbindelserna på vägarna i en plan."""
+        return [route_id for route_ids in plan.values() if route_ids is not None
+                for route_id in route_ids if state.route_owner[route_id] == -1]
+
+    @staticmethod
+    def _rollout_move(sim, player, plans, by_length, rng):
+        """Väljer ett billigt drag i simuleringen: en förbindelse på biljetternas vägar, annars att dra kort.
+
+        Är alla biljetter klara tas den längsta förbindelse som spelaren har kort till.
+        """
+        player_state = sim.players[player]
+        if all(player_state.completed):
+            hand = player_state.hand
+            limit = min(player_state.trains, max(hand[:LOCOMOTIVE]) + hand[LOCOMOTIVE])
+            for route_id in by_length:
+                if sim.route_owner[route_id] == -1 and sim.routes[route_id][2] <= limit:
+                    return route_id, claim_color(sim, player, route_id)
+            return None
+        MctsPolicy._refresh(sim, player, plans)
+        target_routes = MctsPolicy._targets(sim, plans[player])
+        start = rng.randrange(len(target_routes)) if target_routes else 0
+        for route_id in target_routes[start:] + target_routes[:start]:
+            color = claim_color(sim, player, route_id)
+            if color is not None:
+                return route_id, color
+        return None
+
+    @staticmethod
+    def _estimate(sim, plans):
+        """Uppskattar spelarnas slutpoäng i simuleringens sista ställning.
+
+        Förbindelser, klara biljetter och bonusen för längsta tåget räknas som i GameState.final_scores.
+        En ofärdig biljett räknas mellan full förlust och full vinst efter hur stor del av spelarens
+        tåg som behövs för resten av vägen. Är vägen avskuren eller för lång dras hela poängen av.
+
+        Returns:
+            List[float]: Den uppskattade poängen per spelare.
+        """
+        longest = sim.longest_routes()
+        best = max(longest, default=0)
+        scores = []
+        for player, (player_state, length) in enumerate(zip(sim.players, longest)):
+            score = player_state.route_points + player_state.ticket_points
+            if best and length == best:
+                score += LONGEST_ROUTE_BONUS
+            if player_state.open_points:
+                MctsPolicy._refresh(sim, player, plans)
+                for index, route_ids in plans[player].items():
+                    if player_state.completed[index]:
+                        continue
+                    points = player_state.tickets[index][2]
+                    remaining = None if route_ids is None else sum(
+                        sim.routes[route_id][2] for route_id in route_ids if sim.route_owner[route_id] == -1)
+                    if remaining is None or remaining > player_state.trains:
+                        score -= points
+                    else:
+                        score += points * (1 - 2 * remaining / max(player_state.trains, 1))
+            scores.append(score)
+        return scores
+
+
+# =================
+# Partier
+
+def deal_tickets(state, player, rng):
+    """Ger en spelare korta biljetter från route_creater och långa från long_route.
+
+    Returns:
+        List[Tuple[str, int]]: Biljettyp och poäng, i samma ordning som spelarens biljetter.
+    """
+    dealt = []
+    for _ in range(SHORT_TICKETS):
+        ticket = core.route_creater(SHORT_TICKET_TRAINS, rng)
+        state.add_ticket(player, ticket["route"][0], ticket["route"][-1], ticket["points"])
+        dealt.append(("short", ticket["points"]))
+    for _ in range(LONG_TICKETS):
+        route = core.long_route(rng)[0]["route"]
+        start, end = route[0], route[-1]
+        shortest_cost, _ = core.a_star(start, end, core.compact_graph)
+        points = core.calculate_points(core.graph.cities[start]["coords"], core.graph.cities[end]["coords"],
+                                       shortest_cost, rng)
+        state.add_ticket(player, start, end, points)
+        dealt.append(("long", points))
+    return dealt
+
+
+def play_game(policy_names, seed):
+    """Spelar ett helt parti.
+
+    När en spelare har få tåg kvar får alla, den spelaren inräknad, ett sista drag. Partiet
+    avbryts också om ingen kan göra något en hel runda.
+
+    Args:
+        policy_names (List[str]): Datorspelarna i turordning.
+        seed (int | str): Fröet för partiet.
+
+    Returns:
+        dict: Spelarna, slutpoängen, antal drag, tiden per drag i sekunder och biljetternas utfall.
+    """
+    rng = random.Random(seed)
+    policies = [POLICIES[name]() for name in policy_names]
+    num_players = len(policies)
+    state = GameState(num_players=num_players, seed=rng.getrandbits(32))
+    dealt = [deal_tickets(state, player, rng) for player in range(num_players)]
+
+    latencies = [[] for _ in range(num_players)]
+    player = 0
+    turns = 0
+    passes = 0
+    final_turns = None
+    while turns < MAX_TURNS:
+        start = time.perf_counter()
+        move = policies[player].choose(state, player, rng)
+        latencies[player].append(time.perf_counter() - start)
+        passes = 0 if play_move(state, player, move) else passes + 1
+        turns += 1
+
+        if final_turns is not None:
+            final_turns -= 1
+            if final_turns == 0:
+                break
+        elif state.last_round:
+            final_turns = num_players
+        if passes >= num_players:
+            break
+        player = (player + 1) % num_players
+
+    tickets = []
+    for player_dealt, player_state in zip(dealt, state.players):
+        tickets.extend((kind, points, completed) for (kind, points), completed in zip(player_dealt, player_state.completed))
+    return {
+        "policies": list(policy_names),
+        "scores": state.final_scores(),
+        "turns": turns,
+        "latencies": latencies,
+        "tickets": tickets,
+    }
+
+
+def _play_chunk(args):
+    """Spelar ett block av partier. Körs i arbetsprocesserna.
+
+    Spelarnas ordning roteras mellan partierna så att ingen datorspelare alltid börjar.
+
+    Args:
+        args (Tuple[int, int, int, List[str]]): Fröet, blockets nummer, antal partier och datorspelarna.
+
+    Returns:
+        List[dict]: Resultatet från play_game för varje parti.
+    """
+    seed, chunk_index, count, policy_names = args
+    results = []
+    for i in range(count):
+        game_index = chunk_index * GAMES_PER_CHUNK + i
+        shift = game_index % len(policy_names)
+        results.append(play_game(policy_names[shift:] + policy_names[:shift], f"{seed}:{game_index}"))
+    return results
+
+
+def run_games(games, seed, policy_names, workers=1):
+    """Spelar många partier och sammanfattar resultatet.
+
+    Resultatet, förutom tiderna, beror bara på `games`, `seed` och `policy_names`.
+
+    Args:
+        games (int): Antal partier.
+        seed (int): Fröet för partierna.
+        policy_names (List[str]): Datorspelarna, en per plats vid bordet.
+        workers (int): Antal processer, 1 kör allt i den egna processen.
+
+    Returns:
+        dict: Rapporten, se `_summarize`.
+    """
+    chunks = [(seed, index, min(GAMES_PER_CHUNK, games - index * GAMES_PER_CHUNK), list(policy_names))
+              for index in range((games + GAMES_PER_CHUNK - 1) // GAMES_PER_CHUNK)]
+
+    start = time.perf_counter()
+    if workers <= 1:
+        init_worker()
+        results = [game for chunk in chunks for game in _play_chunk(chunk)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+            results = [game for chunk in executor.map(_play_chunk, chunks) for game in chunk]
+    elapsed = time.perf_counter() - start
+
+    report = _summarize(results, policy_names)
+    report.update({"seed": seed, "workers": workers, "elapsed_s": elapsed,
+                   "games_per_second": len(results) / elapsed if elapsed else 0.0})
+    return report
+
+
+def _summarize(results, policy_names):
+    """Sammanfattar partierna.
+
+    Returns:
+        dict: Per datorspelare andel vinster, medelpoäng och tid per drag, en tabell med hur ofta
+        varje datorspelare fick fler poäng än varje annan och biljetternas utfall per typ.
+    """
+    names = sorted(set(policy_names))
+    wins = dict.fromkeys(names, 0.0)
+    seats = dict.fromkeys(names, 0)
+    score_sums = dict.fromkeys(names, 0)
+    latencies = {name: [] for name in names}
+    beats = {a: {b: 0 for b in names} for a in names}
+    meetings = {a: {b: 0 for b in names} for a in names}
+    tickets = {kind: {"count": 0, "completed": 0, "points": 0} for kind in KINDS}
+    turns = 0
+
+    for game in results:
+        scores = game["scores"]
+        best = max(scores)
+        winners = [seat for seat, score in enumerate(scores) if score == best]
+        for seat, name in enumerate(game["policies"]):
+            seats[name] += 1
+            score_sums[name] += scores[seat]
+            latencies[name].extend(game["latencies"][seat])
+            if seat in winners:
+                wins[name] += 1 / len(winners)  # Delad vinst delas lika
+            for other_seat, other in enumerate(game["policies"]):
+                if other_seat != seat:
+                    meetings[name][other] += 1
+                    beats[name][other] += scores[seat] > scores[other_seat]
+        for kind, points, completed in game["tickets"]:
+            tickets[kind]["count"] += 1
+            tickets[kind]["completed"] += completed
+            tickets[kind]["points"] += points
+        turns += game["turns"]
+
+    policies = {}
+    for name in names:
+        moves = sorted(latencies[name])
+        policies[name] = {
+            "seats": seats[name],
+            "win_rate": wins[name] / seats[name] if seats[name] else 0.0,
+            "mean_score": score_sums[name] / seats[name] if seats[name] else 0.0,
+            "moves": len(moves),
+            "latency_ms": {p: percentile(moves, p) * 1000 for p in LATENCY_PERCENTILES},
+        }
+
+    return {
+        "games": len(results),
+        "mean_turns": turns / len(results) if results else 0.0,
+        "policies": policies,
+        "beats": {a: {b: beats[a][b] / meetings[a][b] for b in names if meetings[a][b]} for a in names},
+        "tickets": {kind: {
+            "count": values["count"],
+            "completion_rate": values["completed"] / values["count"] if values["count"] else 0.0,
+            "mean_points": values["points"] / values["count"] if values["count"] else 0.0,
+        } for kind, values in tickets.items()},
+    }
+
+
+def main(argv=None):
+    """Kommandoradsgränssnittet för partierna."""
+    parser = argparse.ArgumentParser(description="Spelar partier mellan datorspelare.")
+    parser.add_argument("--games", type=int, default=100, help="antal partier (standard 100)")
+    parser.add_argument("--seed", type=int, default=0, help="frö för slumpgeneratorn")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="antal processer (standard alla kärnor)")
+    parser.add_argument("--policies", nargs="+", choices=sorted(POLICIES), default=["greedy", "random"],
+                        help="datorspelarna, en per plats vid bordet")
+    parser.add_argument("--json", help="skriver hela rapporten som JSON till filen")
+    args = parser.parse_args(argv)
+
+    report = run_games(args.games, args.seed, args.policies, args.workers)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    print(f"{report['games']} partier på {report['elapsed_s']:.2f} s, {report['games_per_second']:.1f} partier/s, "
+          f"{report['mean_turns']:.1f} drag per parti")
+    for name, summary in report["policies"].items():
+        latency = ", ".join(f"p{p} {value:.2f} ms" for p, value in summary["latency_ms"].items())
+        print(f"{name:8} vinster {summary['win_rate']:6.1%}  medelpoäng {summary['mean_score']:6.1f}  {latency}")
+    print("andel partier där raden fick fler poäng än kolumnen:")
+    for a, row in report["beats"].items():
+        print(f"{a:8} " + "  ".join(f"{b} {value:6.1%}" for b, value in row.items()))
+    for kind, summary in report["tickets"].items():
+        print(f"{kind}-biljetter: {summary['count']} st, klara {summary['completion_rate']:.1%}, "
+              f"medelpoäng {summary['mean_points']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Monte Carlo-simulering av biljetternas poäng, för att balansera poängformeln i core.calculate_points.
+
+Exempel:
+    python simulator.py --samples 1000000 --seed 1 --workers 8
+"""
+import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import core
+from tickets import chunk_rng, init_worker
+
+# Antal biljetter per arbetsuppgift, fast av samma skäl som tickets.CHUNK_SIZE
+CHUNK_SIZE = 4096
+
+# Biljettyperna som simuleras: korta från route_planner och långa från lsh
+KINDS = ("short", "long")
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+# =================
+# Simulering
+
+def _simulate_chunk(args):
+    """Simulerar ett block av biljetter av båda typerna. Körs i arbetsprocesserna.
+
+    Args:
+        args (Tuple[int, int, int, int]): Fröet, blockets nummer, antal biljetter och antal tåg.
+
+    Returns:
+        dict: Histogram och summor per biljettyp, se `_aggregate`.
+    """
+    seed, chunk_index, count, num_trains = args
+    rng = chunk_rng(seed, chunk_index)
+    cities = core.graph.cities
+    ids = core.compact_graph.ids
+
+    samples = {kind: ([], [], [], []) for kind in KINDS}  # poäng, kostnad, startstad, slutstad
+    for _ in range(count):
+        route = core.route_planner(num_trains, rng)
+        _sample(samples["short"], route[0], route[-1], cities, ids, rng)
+
+        start_city, end_city = core.lsh(rng)
+        _sample(samples["long"], start_city, end_city, cities, ids, rng)
+
+    return {kind: _aggregate(*samples[kind], len(ids)) for kind in KINDS}
+
+
+def _sample(columns, start_city, end_city, cities, ids, rng):
+    """Beräknar kostnad och poäng för en biljett och lägger till dem i kolumnerna."""
+    shortest_cost, _ = core.a_star(start_city, end_city, core.compact_graph)
+    points = core.calculate_points(cities[start_city]["coords"], cities[end_city]["coords"], shortest_cost, rng)
+    points_column, cost_column, start_column, end_column = columns
+    points_column.append(points)
+    cost_column.append(shortest_cost)
+    start_column.append(ids[start_city])
+    end_column.append(ids[end_city])
+
+
+def _aggregate(points, costs, starts, ends, num_cities):
+    """Sammanfattar ett blocks biljetter med heltalshistogram och heltalssummor.
+
+    Heltal gör att blocken kan slås ihop i vilken ordning som helst med exakt samma resultat.
+
+    Returns:
+        dict: Histogram över poäng och kostnad, stadsfrekvenser och summorna
+        [antal, Σpoäng, Σkostnad, Σpoäng², Σkostnad², Σpoäng·kostnad].
+    """
+    points = np.asarray(points, dtype=np.int64)
+    costs = np.asarray(costs, dtype=np.int64)
+    return {
+        "points_histogram": np.bincount(points),
+        "cost_histogram": np.bincount(costs),
+        "start_counts": np.bincount(np.asarray(starts, dtype=np.int64), minlength=num_cities),
+        "end_counts": np.bincount(np.asarray(ends, dtype=np.int64), minlength=num_cities),
+        "moments": np.array([points.size, points.sum(), costs.sum(), points @ points, costs @ costs,
+                             points @ costs], dtype=np.int64),
+    }
+
+
+def _merge(total, part):
+    """Lägger ihop två sammanfattningar från `_aggregate`."""
+    if total is None:
+        return part
+    merged = {}
+    for key, values in total.items():
+        other = part[key]
+        if values.size < other.size:
+            values, other = other, values
+        values = values.copy()
+        values[:other.size] += other
+        merged[key] = values
+    return merged
+
+
+def _percentiles(histogram):
+    """Beräknar percentiler från ett heltalshistogram."""
+    cumulative = np.cumsum(histogram)
+    if cumulative[-1] == 0:
+        return {}
+    return {p: int(np.searchsorted(cumulative, cumulative[-1] * p / 100)) for p in PERCENTILES}
+
+
+def _summarize(aggregate, names):
+    """Gör om en sammanfattning till en rapport med vanliga Python-typer.
+
+    Args:
+        aggregate (dict): Sammanfattningen från `_aggregate`/`_merge`.
+        names (List[str]): Städernas namn i id-ordning.
+
+    Returns:
+        dict: Fördelningen av poäng, korrelationen mellan poäng och kortaste kostnad samt stadsfrekvenser.
+    """
+    count, sum_points, sum_costs, sum_points_sq, sum_costs_sq, sum_product = (int(v) for v in aggregate["moments"])
+    if count == 0:
+        return {"count": 0}
+
+    points_histogram = aggregate["points_histogram"]
+    mean_points = sum_points / count
+    mean_costs = sum_costs / count
+    var_points = sum_points_sq / count - mean_points ** 2
+    var_costs = sum_costs_sq / count - mean_costs ** 2
+    covariance = sum_product / count - mean_points * mean_costs
+    correlation = covariance / np.sqrt(var_points * var_costs) if var_points > 0 and var_costs > 0 else None
+
+    nonzero = np.flatnonzero(points_histogram)
+    frequency = aggregate["start_counts"] + aggregate["end_counts"]
+    return {
+        "count": count,
+        "points": {
+            "mean": mean_points,
+            "std": float(np.sqrt(max(var_points, 0.0))),
+            "min": int(nonzero[0]),
+            "max": int(nonzero[-1]),
+            "percentiles": _percentiles(points_histogram),
+            "histogram": {int(p): int(points_histogram[p]) for p in nonzero},
+        },
+        "shortest_cost": {
+            "mean": mean_costs,
+            "histogram": {int(c): int(n) for c, n in enumerate(aggregate["cost_histogram"]) if n},
+        },
+        "points_cost_correlation": None if correlation is None else float(correlation),
+        "city_frequency": {names[i]: int(n) for i, n in enumerate(frequency)},
+        "start_frequency": {names[i]: int(n) for i, n in enumerate(aggregate["start_counts"])},
+        "end_frequency": {names[i]: int(n) for i, n in enumerate(aggregate["end_counts"])},
+    }
+
+
+def simulate(samples, seed, num_trains=9, workers=1):
+    """Simulerar `samples` biljetter av varje typ och sammanfattar poängfördelningen.
+
+    Resultatet beror bara på `samples`, `seed` och `num_trains`, inte på antalet processer.
+
+    Args:
+        samples (int): Antal biljetter per typ.
+        seed (int): Fröet för slumpgeneratorerna.
+        num_trains (int): Antal tåg att använda i de korta rutterna.
+        workers (int): Antal processer, 1 kör allt i den egna processen.
+
+    Returns:
+        dict: En rapport per biljettyp ("short" och "long").
+    """
+    chunks = [(seed, index, min(CHUNK_SIZE, samples - index * CHUNK_SIZE), num_trains)
+              for index in range((samples + CHUNK_SIZE - 1) // CHUNK_SIZE)]
+
+    if workers <= 1:
+        init_worker()
+        results = map(_simulate_chunk, chunks)
+        return _collect(results, samples, seed, num_trains)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+        return _collect(executor.map(_simulate_chunk, chunks), samples, seed, num_trains)
+
+
+def _collect(results, samples, seed, num_trains):
+    """Slår ihop blockens resultat till den färdiga rapporten."""
+    totals = {kind: None for kind in KINDS}
+    for result in results:
+        for kind in KINDS:
+            totals[kind] = _merge(totals[kind], result[kind])
+
+    report = {"samples": samples, "seed": seed, "num_trains": num_trains}
+    for kind in KINDS:
+        report[kind] = _summarize(totals[kind], core.compact_graph.names) if totals[kind] else {"count": 0}
+    return report
+
+
+def main(argv=None):
+    """Kommandoradsgränssnittet för simuleringen."""
+    parser = argparse.ArgumentParser(description="Simulerar poängfördelningen för biljetter.")
+    parser.add_argument("--samples", type=int, required=True, help="antal biljetter per typ")
+    parser.add_argument("--seed", type=int, required=True, help="frö för slumpgeneratorn")
+    parser.add_argument("--trains", type=int, default=9, help="antal tåg per kort rutt (standard 9)")
+    parser.add_argument("--workers", type=int, default=1, help="antal processer (standard 1)")
+    parser.add_argument("--json", help="skriver hela rapporten som JSON till filen")
+    args = parser.parse_args(argv)
+
+    report = simulate(args.samples, args.seed, args.trains, args.workers)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    print(f"{args.samples} biljetter per typ, frö {args.seed}")
+    for kind in KINDS:
+        summary = report[kind]
+        if not summary["count"]:
+            continue
+        points = summary["points"]
+        correlation = summary["points_cost_correlation"]
+        print(f"{kind}: poäng medel {points['mean']:.2f} std {points['std']:.2f} "
+              f"min {points['min']} max {points['max']} percentiler {points['percentiles']}, "
+              f"korrelation med kortaste kostnad {correlation if correlation is None else round(correlation, 3)}")
+        top = sorted(summary["city_frequency"].items(), key=lambda item: -item[1])[:5]
+        print(f"{kind}: vanligaste städerna {top}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Rutnätsindex för att snabbt hitta städer och förbindelser under muspekaren.
+
+Städerna och förbindelserna sorteras en gång in i ett likformigt rutnät i fönstrets skala. En
+fråga tittar bara i rutorna inom toleransen runt punkten, så tiden beror på hur tätt kartan är
+ritad och inte på hur många förbindelser den har.
+"""
+import math
+
+from game_state import claimable_routes
+
+# Rutornas storlek i pixlar, ungefär en förbindelses längd på den riktiga kartan
+CELL_SIZE = 64
+
+
+class SpatialIndex:
+    def __init__(self, points, segments, cell_size=CELL_SIZE):
+        """Bygger indexet.
+
+        Args:
+            points (List[Tuple[float, float]]): Städernas positioner, indexet i listan är stadens id.
+            segments (List[Tuple[int, int]]): Förbindelserna som par av städernas id, indexet i listan är förbindelsens id.
+            cell_size (float): Rutornas storlek i pixlar.
+        """
+        self.points = points
+        self.segments = segments
+        self.cell_size = cell_size
+        self._point_cells = {}
+        self._segment_cells = {}
+
+        for city_id, (x, y) in enumerate(points):
+            self._point_cells.setdefault(self._cell(x, y), []).append(city_id)
+
+        for segment_id, (a_id, b_id) in enumerate(segments):
+            (ax, ay), (bx, by) = points[a_id], points[b_id]
+            min_x, min_y = self._cell(min(ax, bx), min(ay, by))
+            max_x, max_y = self._cell(max(ax, bx), max(ay, by))
+            for cell_x in range(min_x, max_x + 1):
+                for cell_y in range(min_y, max_y + 1):
+                    if self._segment_touches_cell(ax, ay, bx, by, cell_x, cell_y):
+                        self._segment_cells.setdefault((cell_x, cell_y), []).append(segment_id)
+
+    @classmethod
+    def from_graph(cls, graph_local, scale=1.0, cell_size=CELL_SIZE):
+        """Bygger indexet för en karta i en viss skala.
+
+        Förbindelsernas id är desamma som i game_state.claimable_routes.
+
+        Args:
+            graph_local (CompactGraph): Kartan.
+            scale (float): Fönstrets skala, se AssetManager.
+            cell_size (float): Rutornas storlek i pixlar i fönstrets skala.
+
+        Returns:
+            SpatialIndex: Indexet.
+        """
+        points = [(x * scale, y * scale) for x, y in zip(graph_local.xs, graph_local.ys)]
+        segments = [(a_id, b_id) for a_id, b_id, _ in claimable_routes(graph_local)]
+        return cls(points, segments, cell_size)
+
+    def _cell(self, x, y):
+        """Rutan som en punkt ligger i."""
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def _segment_touches_cell(self, ax, ay, bx, by, cell_x, cell_y):
+        """Avgör om en sträcka når in i en ruta, så att långa sned sträckor inte fyller hela sin ram."""
+        half = self.cell_size / 2
+        center_x = (cell_x + 0.5) * self.cell_size
+        center_y = (cell_y + 0.5) * self.cell_size
+        # Avståndet från rutans mittpunkt är högst halva diagonalen om sträckan når in i rutan
+        return _segment_distance_sq(center_x, center_y, ax, ay, bx, by) <= 2 * half * half
+
+    def _cells_around(self, x, y, tolerance):
+        """Rutorna som överlappar kvadraten med sidan 2 * tolerance runt punkten."""
+        min_x, min_y = self._cell(x - tolerance, y - tolerance)
+        max_x, max_y = self._cell(x + tolerance, y + tolerance)
+        for cell_x in range(min_x, max_x + 1):
+            for cell_y in range(min_y, max_y + 1):
+                yield cell_x, cell_y
+
+    def nearest_city(self, position, tolerance):
+        """Hittar staden närmast en punkt.
+
+        Args:
+            position (Tuple[float, float]): Punkten i fönstrets koordinater, t.ex. event.pos.
+            tolerance (float): Största avståndet i pixlar.
+
+        Returns:
+            int | None: Stadens id, None om ingen stad ligger inom toleransen.
+        """
+        x, y = position
+        best = None
+        best_distance = tolerance * tolerance
+        for cell in self._cells_around(x, y, tolerance):
+            for city_id in self._point_cells.get(cell, ()):
+                px, py = self.points[city_id]
+                distance = (px - x) ** 2 + (py - y) ** 2
+                if distance <= best_distance:
+                    best = city_id
+                    best_distance = distance
+        return best
+
+    def nearest_segment(self, position, tolerance):
+        """Hittar förbindelsen närmast en punkt.
+
+        Args:
+            position (Tuple[float, float]): Punkten i fönstrets koordinater, t.ex. event.pos.
+            tolerance (float): Största avståndet i pixlar.
+
+        Returns:
+            int | None: Förbindelsens id, None om ingen förbindelse ligger inom toleransen.
+        """
+        x, y = position
+        best = None
+        best_distance = tolerance * tolerance
+        for cell in self._cells_around(x, y, tolerance):
+            for segment_id in self._segment_cells.get(cell, ()):
+                a_id, b_id = self.segments[segment_id]
+                (ax, ay), (bx, by) = self.points[a_id], self.points[b_id]
+                distance = _segment_distance_sq(x, y, ax, ay, bx, by)
+                if distance <= best_distance:
+                    best = segment_id
+                    best_distance = distance
+        return best
+
+    def hit_test(self, position, tolerance):
+        """Hittar vad som ligger under en punkt. En stad går före en förbindelse.
+
+        Args:
+            position (Tuple[float, float]): Punkten i fönstrets koordinater.
+            tolerance (float): Största avståndet i pixlar.
+
+        Returns:
+            Tuple[str, int] | None: ("city", id) eller ("segment", id), None om inget träffas.
+        """
+        city_id = self.nearest_city(position, tolerance)
+        if city_id is not None:
+            return "city", city_id
+        segment_id = self.nearest_segment(position, tolerance)
+        if segment_id is not None:
+            return "segment", segment_id
+        return None
+
+    def stats(self):
+        """Hämtar storleken på indexet.
+
+        Returns:
+            dict: Antal städer, förbindelser, använda rutor och största antal förbindelser i en ruta.
+        """
+        return {
+            "cities": len(self.points),
+            "segments": len(self.segments),
+            "city_cells": len(self._point_cells),
+            "segment_cells": len(self._segment_cells),
+            "max_segments_per_cell": max(map(len, self._segment_cells.values()), default=0),
+        }
+
+
+def _segment_distance_sq(x, y, ax, ay, bx, by):
+    """Kvadraten på avståndet från en punkt till en sträcka."""
+    dx = bx - ax
+    dy = by - ay
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        t = 0.0
+    else:
+        t = max(0.0, min(1.0, ((x - ax) * dx + (y - ay) * dy) / length_sq))
+    px = ax + t * dx - x
+    py = ay + t * dy - y
+    return px * px + py * py
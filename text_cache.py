@@ -0,0 +1,99 @@
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache:
+    def __init__(self, max_surfaces=512):
+        """Delad cache för teckensnitt och renderade textytor.
+
+        Teckensnitten laddas en gång per (typsnitt, storlek). Renderade ytor sparas i en
+        begränsad LRU-cache med nyckeln (text, typsnitt, storlek, färg, kantutjämning).
+
+        Args:
+            max_surfaces (int): Högsta antal renderade ytor i cachen.
+        """
+        self.max_surfaces = max_surfaces
+        self._fonts = {}
+        self._surfaces = OrderedDict()
+
+        # Räknare för att kontrollera att inget nytt renderas när spelet står still
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.font_loads = 0
+
+    def font(self, face, size):
+        """Hämtar ett teckensnitt och laddar det bara första gången.
+
+        Args:
+            face (str | None): Systemtypsnittets namn, None för pygames standardtypsnitt.
+            size (int): Storleken.
+
+        Returns:
+            pygame.font.Font: Teckensnittet.
+        """
+        key = (face, size)
+        font = self._fonts.get(key)
+        if font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            if face is None:
+                font = pygame.font.Font(pygame.font.get_default_font(), size)
+            else:
+                font = pygame.font.SysFont(face, size)
+            self._fonts[key] = font
+            self.font_loads += 1
+        return font
+
+    def render(self, text, face, size, color, antialias=False):
+        """Renderar en text, eller hämtar den från cachen om den redan har renderats.
+
+        Ytan som returneras delas mellan alla anrop och ska inte ändras.
+
+        Args:
+            text (str): Texten.
+            face (str | None): Systemtypsnittets namn, None för pygames standardtypsnitt.
+            size (int): Storleken.
+            color: Textens färg.
+            antialias (bool): Om texten ska kantutjämnas.
+
+        Returns:
+            pygame.Surface: Ytan med renderad text.
+        """
+        key = (text, face, size, color, antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self.font(face, size).render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_surfaces:
+            self._surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        """Tömmer cachen med renderade ytor. Teckensnitten behålls."""
+        self._surfaces.clear()
+
+    def stats(self):
+        """Hämtar cachens räknare.
+
+        Returns:
+            dict: Träffar, missar, utkastade ytor, laddade teckensnitt och antal ytor i cachen.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "font_loads": self.font_loads,
+            "surfaces": len(self._surfaces),
+        }
+
+
+# Delad cache för hela spelet
+text_cache = TextCache()
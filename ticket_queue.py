@@ -0,0 +1,147 @@
+"""Biljetter som genereras i förväg i en bakgrundstråd, så att ett klick aldrig behöver vänta på dem.
+
+Tråden håller några färdiga uppsättningar biljetter per sort. Ett klick tar en färdig uppsättning
+direkt. Finns ingen färdig genereras en i första hand, och `notify` anropas när den är klar så att
+spel-loopen kan vakna. Resultatet hämtas med `take` mellan två bilder, så spel-loopen byter aldrig
+rutter mitt i en bild.
+"""
+import random
+import threading
+import time
+from collections import deque
+
+# Antal färdiga uppsättningar biljetter per sort
+PREFETCH = 4
+
+
+class TicketQueue:
+    def __init__(self, generators, prefetch=PREFETCH, seed=None, notify=None):
+        """Skapar kön. Tråden startas med `start`.
+
+        Args:
+            generators (Dict[str, Callable[[random.Random], List[dict]]]): Funktion per sort som genererar en uppsättning biljetter.
+            prefetch (int): Antal färdiga uppsättningar som hålls per sort.
+            seed (int | None): Fröet för bakgrundstrådens slumpgenerator.
+            notify (Callable[[], None] | None): Anropas från bakgrundstråden när en efterfrågad uppsättning blivit klar.
+        """
+        self.generators = generators
+        self.prefetch = prefetch
+        self.notify = notify
+        self.rng = random.Random(seed)
+
+        self._condition = threading.Condition()
+        self._ready = {kind: deque() for kind in generators}
+        self._waiting = None  # Sorten som efterfrågats men inte fanns färdig
+        self._result = None  # Uppsättningen som ska visas vid nästa bild
+        self._running = False
+        self._thread = None
+
+        self.generated = dict.fromkeys(generators, 0)
+        self.generation_time = dict.fromkeys(generators, 0.0)
+        self.hits = 0  # Klick som fick en färdig uppsättning direkt
+        self.misses = 0  # Klick som fick vänta på bakgrundstråden
+
+    def start(self):
+        """Startar bakgrundstråden."""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="ticket-queue", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stoppar bakgrundstråden och väntar tills den har avslutat sin pågående generering."""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def request(self, kind):
+        """Beställer en ny uppsättning biljetter av en sort.
+
+        Args:
+            kind (str): Sorten, en nyckel i `generators`.
+
+        Returns:
+            bool: True om en färdig uppsättning fanns och kan hämtas med `take` direkt.
+        """
+        with self._condition:
+            if self._ready[kind]:
+                self._result = self._ready[kind].popleft()
+                self._waiting = None
+                self.hits += 1
+                ready = True
+            else:
+                # Ett senare klick ersätter ett tidigare som inte hunnit bli klart
+                self._result = None
+                self._waiting = kind
+                self.misses += 1
+                ready = False
+            self._condition.notify()
+        return ready
+
+    def take(self):
+        """Hämtar den senast beställda uppsättningen om den är klar. Anropas mellan två bilder.
+
+        Returns:
+            List[dict] | None: Biljetterna, None om ingen ny uppsättning finns.
+        """
+        with self._condition:
+            result, self._result = self._result, None
+        return result
+
+    def _next_kind(self):
+        """Väljer vad som ska genereras härnäst, en efterfrågad sort går först."""
+        if self._waiting is not None:
+            return self._waiting
+        for kind, ready in self._ready.items():
+            if len(ready) < self.prefetch:
+                return kind
+        return None
+
+    def _run(self):
+        """Bakgrundstrådens loop."""
+        while True:
+            with self._condition:
+                kind = self._next_kind()
+                while kind is None and self._running:
+                    self._condition.wait()
+                    kind = self._next_kind()
+                if not self._running:
+                    return
+
+            start = time.perf_counter()
+            routes = self.generators[kind](self.rng)
+            elapsed = time.perf_counter() - start
+
+            with self._condition:
+                self.generated[kind] += 1
+                self.generation_time[kind] += elapsed
+                delivered = self._waiting == kind
+                if delivered:
+                    self._result = routes
+                    self._waiting = None
+                else:
+                    self._ready[kind].append(routes)
+            if delivered and self.notify is not None:
+                self.notify()
+
+    def stats(self):
+        """Hämtar statistik för kön.
+
+        Returns:
+            dict: Antal genererade uppsättningar och medeltid i millisekunder per sort, antal
+            färdiga i kön och hur många klick som fick en färdig uppsättning direkt.
+        """
+        with self._condition:
+            return {
+                "generated": dict(self.generated),
+                "mean_generation_ms": {kind: self.generation_time[kind] / count * 1000 if count else 0.0
+                                       for kind, count in self.generated.items()},
+                "ready": {kind: len(ready) for kind, ready in self._ready.items()},
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,251 @@
+"""Generering av biljetter i stora mängder, utan pygame.
+
+Exempel:
+    python tickets.py --count 1000000 --seed 42 --workers 8 --output tickets.jsonl
+"""
+import argparse
+import json
+import random
+import struct
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import core
+
+# Antal biljetter per arbetsuppgift. Storleken är fast så att resultatet blir detsamma oavsett antal processer.
+CHUNK_SIZE = 1024
+
+# Binärformatet: filhuvud följt av stadstabellen och en post per biljett
+BINARY_MAGIC = b"TTRT"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sHH")  # magic, version, antal städer
+BINARY_RECORD = struct.Struct("<IHHBB")  # id, poäng, kostnad, antal städer i rutten, antal städer i kortaste vägen
+
+
+# =================
+# Generering
+
+def generate_ticket(num_trains, rng):
+    """Genererar en biljett som vanlig data.
+
+    Args:
+        num_trains (int): Antal tåg att använda i rutten.
+        rng (random.Random): Slumpgeneratorn som används.
+
+    Returns:
+        dict: Rutten, kortaste kostnaden, kortaste vägen och poängen.
+    """
+    route = core.route_planner(num_trains, rng)
+    shortest_cost, shortest_path = core.a_star(route[0], route[-1], core.compact_graph)
+    points = core.calculate_points(core.graph.cities[route[0]]["coords"], core.graph.cities[route[-1]]["coords"],
+                                   shortest_cost, rng)
+    return {"route": route, "shortest_cost": shortest_cost, "shortest_path": shortest_path, "points": points}
+
+
+def chunk_rng(seed, chunk_index):
+    """Skapar slumpgeneratorn för ett block av biljetter.
+
+    Varje block har en egen generator som bara beror på fröet och blockets nummer, så blocken
+    kan genereras i vilken process och ordning som helst.
+
+    Args:
+        seed (int): Fröet för hela körningen.
+        chunk_index (int): Blockets nummer.
+
+    Returns:
+        random.Random: Slumpgeneratorn för blocket.
+    """
+    return random.Random(f"{seed}:{chunk_index}")
+
+
+def _generate_chunk(args):
+    """Genererar ett block av biljetter. Körs i arbetsprocesserna.
+
+    Args:
+        args (Tuple[int, int, int, int]): Fröet, blockets nummer, antal biljetter och antal tåg.
+
+    Returns:
+        List[dict]: Biljetterna i blocket.
+    """
+    seed, chunk_index, count, num_trains = args
+    rng = chunk_rng(seed, chunk_index)
+    first_id = chunk_index * CHUNK_SIZE
+    tickets = []
+    for i in range(count):
+        ticket = generate_ticket(num_trains, rng)
+        ticket["id"] = first_id + i
+        tickets.append(ticket)
+    return tickets
+
+
+def init_worker():
+    """Kopplar in kortaste-vägen-tabellen i en arbetsprocess.
+
+    Används som `initializer` för processpoolerna här och i simulator.py och selfplay.py, och
+    anropas direkt när allt körs i den egna processen.
+    """
+    core.use_path_table()
+
+
+def generate_tickets(count, seed, num_trains=9, workers=1):
+    """Genererar biljetter som en generator.
+
+    Resultatet beror bara på `count`, `seed` och `num_trains`, inte på antalet processer,
+    och biljetterna kommer alltid i id-ordning. Högst två block per process är i arbete
+    samtidigt, så minnet växer inte med antalet biljetter.
+
+    Args:
+        count (int): Antal biljetter.
+        seed (int): Fröet för slumpgeneratorerna.
+        num_trains (int): Antal tåg att använda i varje rutt.
+        workers (int): Antal processer, 1 kör allt i den egna processen.
+
+    Yields:
+        dict: En biljett i taget.
+    """
+    chunks = ((seed, index, min(CHUNK_SIZE, count - index * CHUNK_SIZE), num_trains)
+              for index in range((count + CHUNK_SIZE - 1) // CHUNK_SIZE))
+
+    if workers <= 1:
+        init_worker()
+        for chunk in chunks:
+            yield from _generate_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_generate_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+# =================
+# Utdata
+
+def jsonl_lines(tickets):
+    """Kodar biljetter som JSON-rader.
+
+    Args:
+        tickets (Iterable[dict]): Biljetterna.
+
+    Yields:
+        str: En rad per biljett, avslutad med radbrytning.
+    """
+    for ticket in tickets:
+        yield json.dumps(ticket, separators=(",", ":")) + "\n"
+
+
+def binary_records(tickets, graph_local=None):
+    """Kodar biljetter i det kompakta binärformatet.
+
+    Först kommer ett filhuvud med stadstabellen, sedan en post per biljett där städerna
+    lagras som 16-bitars id.
+
+    Args:
+        tickets (Iterable[dict]): Biljetterna.
+        graph_local (CompactGraph): Grafen vars id används, som standard core.compact_graph.
+
+    Yields:
+        bytes: Filhuvudet och därefter en post per biljett.
+    """
+    graph_local = graph_local or core.compact_graph
+    names = [name.encode("utf-8") for name in graph_local.names]
+    yield BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(names)) + b"".join(
+        struct.pack("<B", len(name)) + name for name in names)
+
+    ids = graph_local.ids
+    for ticket in tickets:
+        route = ticket["route"]
+        path = ticket["shortest_path"]
+        record = BINARY_RECORD.pack(ticket["id"], ticket["points"], ticket["shortest_cost"], len(route), len(path))
+        yield record + struct.pack(f"<{len(route) + len(path)}H", *(ids[city] for city in route + path))
+
+
+def read_binary(file):
+    """Läser biljetter från en fil i binärformatet.
+
+    Args:
+        file (BinaryIO): Filen, öppnad för läsning.
+
+    Yields:
+        dict: En biljett i taget.
+    """
+    magic, version, num_cities = BINARY_HEADER.unpack(file.read(BINARY_HEADER.size))
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError("Filen är inte en biljettfil i version %d" % BINARY_VERSION)
+    names = []
+    for _ in range(num_cities):
+        (length,) = struct.unpack("<B", file.read(1))
+        names.append(file.read(length).decode("utf-8"))
+
+    while True:
+        header = file.read(BINARY_RECORD.size)
+        if not header:
+            return
+        ticket_id, points, shortest_cost, route_len, path_len = BINARY_RECORD.unpack(header)
+        cities = struct.unpack(f"<{route_len + path_len}H", file.read(2 * (route_len + path_len)))
+        yield {
+            "route": [names[city] for city in cities[:route_len]],
+            "shortest_cost": shortest_cost,
+            "shortest_path": [names[city] for city in cities[route_len:]],
+            "points": points,
+            "id": ticket_id,
+        }
+
+
+def write_tickets(tickets, output, fmt="jsonl"):
+    """Skriver biljetter till en fil medan de genereras.
+
+    Args:
+        tickets (Iterable[dict]): Biljetterna.
+        output (BinaryIO): Filen att skriva till.
+        fmt (str): "jsonl" eller "binary".
+
+    Returns:
+        int: Antal skrivna biljetter.
+    """
+    written = 0
+
+    def counted():
+        nonlocal written
+        for ticket in tickets:
+            written += 1
+            yield ticket
+
+    if fmt == "jsonl":
+        for line in jsonl_lines(counted()):
+            output.write(line.encode("utf-8"))
+    elif fmt == "binary":
+        for record in binary_records(counted()):
+            output.write(record)
+    else:
+        raise ValueError(f"Okänt format: {fmt}")
+    return written
+
+
+def main(argv=None):
+    """Kommandoradsgränssnittet för biljettgenereringen."""
+    parser = argparse.ArgumentParser(description="Genererar biljetter till Ticket to Ride.")
+    parser.add_argument("--count", type=int, required=True, help="antal biljetter")
+    parser.add_argument("--seed", type=int, required=True, help="frö för slumpgeneratorn")
+    parser.add_argument("--trains", type=int, default=9, help="antal tåg per rutt (standard 9)")
+    parser.add_argument("--workers", type=int, default=1, help="antal processer (standard 1)")
+    parser.add_argument("--format", choices=("jsonl", "binary"), default="jsonl", help="utdataformat")
+    parser.add_argument("--output", default="-", help="utdatafil, - för stdout")
+    args = parser.parse_args(argv)
+
+    tickets = generate_tickets(args.count, args.seed, args.trains, args.workers)
+    if args.output == "-":
+        write_tickets(tickets, sys.stdout.buffer, args.format)
+        sys.stdout.buffer.flush()
+    else:
+        with open(args.output, "wb") as output:
+            write_tickets(tickets, output, args.format)
+
+
+if __name__ == "__main__":
+    main()